@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Approximate Nearest Neighbour Index for BuildCraft AI
+Inverted-file (IVF) index over normalized embeddings, built with spherical
+k-means in NumPy and persisted to disk
+"""
+
+import hashlib
+import os
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+# Target rows per inverted list when nlist is derived from the catalog size;
+# fixed-size lists keep the rows scanned per query flat as the catalog grows
+DEFAULT_LIST_SIZE = 1024
+
+# Training sample per centroid for k-means
+TRAINING_POINTS_PER_LIST = 64
+
+# Rows assigned per block, bounding the temporary score matrix
+_ASSIGN_CHUNK_ROWS = 65536
+
+
+def fingerprint(ids: Sequence[str], content_hashes: Sequence[Optional[str]]) -> str:
+    """Identify the exact rows an index was built over"""
+    digest = hashlib.sha1()
+    for vector_id, content_hash in zip(ids, content_hashes):
+        digest.update(f"{vector_id}\0{content_hash}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class IVFIndex:
+    """Rows grouped into nlist clusters; a query scans only the nprobe nearest
+
+    Lists are stored as one row-number array ordered by cluster plus offsets,
+    so each list is a contiguous, ascending slice.
+    """
+
+    def __init__(self, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray,
+                 nprobe: int = 16, fingerprint: str = "", build_seconds: float = 0.0):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.order = order
+        self.offsets = offsets
+        self.nprobe = nprobe
+        self.fingerprint = fingerprint
+        self.build_seconds = build_seconds
+        self.loaded_from_disk = False
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: int = 0, nprobe: int = 16, iterations: int = 10,
+              fingerprint: str = "", seed: int = 0) -> "IVFIndex":
+        """Cluster normalized vectors with spherical k-means and build the lists
+
+        nlist=0 sizes lists to about DEFAULT_LIST_SIZE rows each.
+        """
+        started = time.perf_counter()
+        count = len(vectors)
+        if nlist <= 0:
+            nlist = max(1, -(-count // DEFAULT_LIST_SIZE))
+        nlist = max(1, min(nlist, count))
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(count, nlist * TRAINING_POINTS_PER_LIST)
+        sample_rows = np.sort(rng.choice(count, size=sample_size, replace=False))
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            sizes = np.bincount(assignment, minlength=nlist)
+            empty = sizes == 0
+            if empty.any():
+                # Reseed empty clusters from random training points
+                sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        assignment = np.empty(count, dtype=np.int64)
+        for start in range(0, count, _ASSIGN_CHUNK_ROWS):
+            block = np.asarray(vectors[start:start + _ASSIGN_CHUNK_ROWS], dtype=np.float32)
+            assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))]).astype(np.int64)
+        return cls(centroids, order, offsets, nprobe=nprobe, fingerprint=fingerprint,
+                   build_seconds=time.perf_counter() - started)
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Ascending row numbers in the nprobe lists nearest to a normalized query"""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        scores = self.centroids @ query
+        if nprobe < self.nlist:
+            probed = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        else:
+            probed = np.arange(self.nlist)
+        rows = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in probed])
+        rows.sort()
+        return rows
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, centroids=self.centroids, order=self.order, offsets=self.offsets,
+                 fingerprint=np.array(self.fingerprint), build_seconds=np.array(self.build_seconds))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = 16) -> Optional["IVFIndex"]:
+        """Load a saved index, or None if the file is missing or unreadable"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as saved:
+                index = cls(saved["centroids"], saved["order"], saved["offsets"], nprobe=nprobe,
+                            fingerprint=str(saved["fingerprint"]), build_seconds=float(saved["build_seconds"]))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: ignoring unreadable ANN index {path}: {e}")
+            return None
+        index.loaded_from_disk = True
+        return index
+
+    def memory_bytes(self) -> int:
+        return int(self.centroids.nbytes + self.order.nbytes + self.offsets.nbytes)
+
+    def stats(self) -> Dict[str, Any]:
+        sizes = np.diff(self.offsets)
+        return {
+            "type": "ivf",
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "vectors": int(len(self.order)),
+            "mean_list_size": round(float(sizes.mean()), 1) if len(sizes) else 0.0,
+            "max_list_size": int(sizes.max()) if len(sizes) else 0,
+            "memory_bytes": self.memory_bytes(),
+            "build_seconds": round(self.build_seconds, 3),
+            "loaded_from_disk": self.loaded_from_disk
+        }
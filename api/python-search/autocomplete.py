@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Name Autocomplete for BuildCraft AI
+Sorted-array prefix index over item, spell and skill names, answered with
+bisect and no model call
+"""
+
+import bisect
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from lexical_index import normalize_name
+
+DEFAULT_PROCESSED_DATA_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "oblivion", "oblivion_processed.json"
+)
+
+
+class PrefixIndex:
+    """Completions for a typed prefix, ranked without scanning the catalog
+
+    Every name is indexed under its full normalized form and under each later
+    word ("razor" finds "Mehrunes' Razor"). Keys live in one sorted list, so a
+    prefix is a contiguous [lo, hi) range found with two bisects. Entries are
+    ranked by: whole-name match before word match, curated source before
+    processed data, then shorter and alphabetically earlier names.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, int]]):
+        """entries are (name, category, source priority); lower priority wins duplicates"""
+        self._names: List[str] = []
+        self._categories: List[str] = []
+        seen: Dict[Tuple[str, str], int] = {}
+        keyed: List[Tuple[str, Tuple[int, int, int, str], int]] = []
+
+        for name, category, priority in entries:
+            normalized = normalize_name(name)
+            if not normalized or (normalized, category) in seen:
+                continue
+            entry = len(self._names)
+            seen[(normalized, category)] = entry
+            self._names.append(name)
+            self._categories.append(category)
+
+            words = normalized.split(" ")
+            for position in range(len(words)):
+                key = " ".join(words[position:])
+                rank = (0 if position == 0 else 1, priority, len(normalized), normalized)
+                keyed.append((key, rank, entry))
+
+        keyed.sort()
+        self._keys = [key for key, _, _ in keyed]
+        self._ranks = [rank for _, rank, _ in keyed]
+        self._entries = [entry for _, _, entry in keyed]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def complete(self, prefix: str, limit: int = 8, category: Optional[str] = None) -> List[Dict[str, str]]:
+        """Best completions for prefix, each name at most once"""
+        prefix = normalize_name(prefix)
+        if not prefix or limit <= 0:
+            return []
+        lo = bisect.bisect_left(self._keys, prefix)
+        hi = bisect.bisect_left(self._keys, prefix + "\uffff", lo)
+
+        best: Dict[int, Tuple[int, int, int, str]] = {}
+        for i in range(lo, hi):
+            entry = self._entries[i]
+            if category and self._categories[entry] != category:
+                continue
+            rank = self._ranks[i]
+            if entry not in best or rank < best[entry]:
+                best[entry] = rank
+
+        ranked = sorted(best, key=best.__getitem__)[:limit]
+        return [{"name": self._names[entry], "category": self._categories[entry]} for entry in ranked]
+
+
+def catalog_names(game_data: Dict[str, List[Dict[str, Any]]],
+                  processed_path: Optional[str] = DEFAULT_PROCESSED_DATA_PATH) -> List[Tuple[str, str, int]]:
+    """(name, category, priority) for the curated game data, then the processed data if present"""
+    entries = [
+        (item["name"], category, 0)
+        for category, items in game_data.items() for item in items if item.get("name")
+    ]
+    if processed_path and os.path.exists(processed_path):
+        try:
+            with open(processed_path, "r", encoding="utf-8") as f:
+                processed = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: skipping processed data for autocomplete: {e}")
+            return entries
+        for category, items in processed.items():
+            if not isinstance(items, list):
+                continue
+            entries.extend(
+                (item["name"], item.get("category", category), 1)
+                for item in items if isinstance(item, dict) and item.get("name")
+            )
+    return entries
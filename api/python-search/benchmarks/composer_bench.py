@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Composer Benchmark for BuildCraft AI
+Times each public OblivionBuildComposer method against synthetic prompts and
+search results, and compares runs with a stored baseline
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from build_composer import OblivionBuildComposer  # noqa: E402
+from oblivion_gamedata import OBLIVION_GAMEDATA  # noqa: E402
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "composer.json")
+
+# Flag a case when its best time grows by more than this fraction; run-to-run
+# noise on a shared machine is around 10%
+DEFAULT_THRESHOLD = 0.25
+
+PROMPT_WORDS = (8, 64, 512)
+THEME_COUNTS = (0, 8, 32, 128)
+COMPOSE_GRID = ((10, 8), (30, 8), (100, 8), (300, 8), (30, 32), (30, 128))
+BATCH_GRID = ((64, 30, 8),)
+
+# Words the composer reacts to, mixed with filler so prompts read like requests
+_SIGNAL_WORDS = [
+    "stealth", "archer", "ranger", "bow", "shadow", "spellsword", "magic", "sword", "mage", "warrior",
+    "tank", "shield", "armor", "assassin", "killer", "battlemage", "spell", "destruction", "restoration",
+    "illusion", "conjuration", "dagger", "axe", "heavy", "light", "fire", "ice", "poison", "holy", "undead"
+]
+_FILLER_WORDS = [
+    "i", "want", "a", "character", "who", "can", "really", "likes", "to", "use", "and", "with", "some",
+    "build", "for", "the", "game", "playing", "strong", "quick", "good", "at", "fighting", "exploring"
+]
+
+
+def synthetic_prompt(words: int, rng: random.Random) -> str:
+    """A prompt of `words` words, about a quarter of them composer keywords"""
+    return " ".join(
+        rng.choice(_SIGNAL_WORDS) if rng.random() < 0.25 else rng.choice(_FILLER_WORDS)
+        for _ in range(words)
+    )
+
+
+def synthetic_results(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Search results shaped like the /build formatted results, best score first"""
+    catalog = [(category, item) for category, items in OBLIVION_GAMEDATA.items() for item in items]
+    results = []
+    for i in range(count):
+        category, item = catalog[rng.randrange(len(catalog))]
+        name = item["name"] if i < len(catalog) else f"{item['name']} {i}"
+        results.append({
+            "name": name,
+            "category": category,
+            "type": item.get("type", category).lower(),
+            "properties": {},
+            "score": round(rng.uniform(0.2, 0.9), 6),
+            "tags": ",".join(item.get("tags", [])),
+            "description": item.get("description", "")
+        })
+    results.sort(key=lambda result: result["score"], reverse=True)
+    return results
+
+
+def synthetic_intent(composer: OblivionBuildComposer, themes: int, rng: random.Random) -> Dict[str, Any]:
+    """An analyzed intent whose theme list is padded or cut to `themes` entries"""
+    intent = composer.analyze_user_intent(synthetic_prompt(24, rng))
+    # Themes come out of a set; sort them so every process benchmarks the same intent
+    pool = list(dict.fromkeys(sorted(intent["themes"]) + _SIGNAL_WORDS))
+    pool += [f"theme{i}" for i in range(max(0, themes - len(pool)))]
+    intent["themes"] = pool[:themes]
+    return intent
+
+
+def benchmark_cases(composer: OblivionBuildComposer, seed: int = 0) -> Dict[str, Callable[[], Any]]:
+    """Named zero-argument calls, one per method and input size"""
+    rng = random.Random(seed)
+    cases: Dict[str, Callable[[], Any]] = {}
+
+    for words in PROMPT_WORDS:
+        prompt = synthetic_prompt(words, rng)
+        cases[f"analyze_user_intent[words={words}]"] = lambda prompt=prompt: composer.analyze_user_intent(prompt)
+
+    for themes in THEME_COUNTS:
+        intent = synthetic_intent(composer, themes, rng)
+        cases[f"recommend_race[themes={themes}]"] = lambda intent=intent: composer.recommend_race(intent)
+
+    for results, themes in COMPOSE_GRID:
+        intent = synthetic_intent(composer, themes, rng)
+        search_results = synthetic_results(results, rng)
+        cases[f"compose_build_from_search_results[results={results},themes={themes}]"] = (
+            lambda intent=intent, search_results=search_results:
+            composer.compose_build_from_search_results(intent, search_results)
+        )
+
+    for builds, results, themes in BATCH_GRID:
+        intents = [synthetic_intent(composer, themes, rng) for _ in range(builds)]
+        result_sets = [synthetic_results(results, rng) for _ in range(builds)]
+        cases[f"compose_builds[builds={builds},results={results},themes={themes}]"] = (
+            lambda intents=intents, result_sets=result_sets: composer.compose_builds(intents, result_sets)
+        )
+
+    return cases
+
+
+def output_digest(call: Callable[[], Any], seed: int) -> str:
+    """Digest of a case's output with the random module seeded, so any behavior change shows up"""
+    random.seed(seed)
+    output = call()
+    if isinstance(output, dict) and isinstance(output.get("themes"), list):
+        # Intent themes are in set order, which varies with the hash seed
+        output = {**output, "themes": sorted(output["themes"])}
+    return hashlib.sha1(json.dumps(output, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def calibrate_loops(call: Callable[[], Any], min_time: float = 0.01) -> int:
+    """Calls per timed loop so that one loop takes about min_time seconds"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            call()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / 5:
+            break
+        loops *= 2
+    return max(1, int(loops * min_time / max(elapsed, 1e-9)))
+
+
+def time_loops(call: Callable[[], Any], loops: int, repeats: int) -> List[float]:
+    """Per-call time in microseconds of each of `repeats` timed loops"""
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(loops):
+            call()
+        samples.append((time.perf_counter() - started) / loops * 1e6)
+    return samples
+
+
+def run_benchmarks(seed: int = 0, repeats: int = 30, min_time: float = 0.01, rounds: int = 5,
+                   only: Optional[str] = None) -> Dict[str, Any]:
+    """Time every case in interleaved rounds, so bursts of background load hit all cases alike"""
+    composer = OblivionBuildComposer()
+    cases = {name: call for name, call in benchmark_cases(composer, seed).items() if not only or only in name}
+    loops = {name: calibrate_loops(call, min_time) for name, call in cases.items()}
+    samples: Dict[str, List[float]] = {name: [] for name in cases}
+    per_round = max(1, -(-repeats // rounds))
+    for _ in range(rounds):
+        for name, call in cases.items():
+            samples[name].extend(time_loops(call, loops[name], per_round))
+
+    results = {}
+    for name, call in cases.items():
+        results[name] = {
+            "median_us": round(statistics.median(samples[name]), 3),
+            "min_us": round(min(samples[name]), 3),
+            "loops": loops[name],
+            "repeats": len(samples[name]),
+            "output": output_digest(call, seed)
+        }
+        print(f"{name}: {results[name]['min_us']:.1f} us", file=sys.stderr)
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {"seed": seed, "repeats": repeats, "rounds": rounds, "min_time": min_time},
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "cases": results
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> Tuple[Dict[str, Any], bool]:
+    """Per-case time ratios against the baseline; fails on slowdowns past threshold or changed output
+
+    Cases are compared on their best loop time, which is the least affected by
+    other load on the machine.
+    """
+    cases = {}
+    failed = False
+    for name, result in current["cases"].items():
+        reference = baseline["cases"].get(name)
+        if reference is None:
+            cases[name] = {"status": "new", "min_us": result["min_us"]}
+            continue
+        ratio = result["min_us"] / reference["min_us"] if reference["min_us"] else 1.0
+        if reference.get("output") and reference["output"] != result["output"]:
+            status = "output_changed"
+        elif ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+        failed = failed or status in ("regression", "output_changed")
+        cases[name] = {
+            "status": status,
+            "baseline_us": reference["min_us"],
+            "min_us": result["min_us"],
+            "ratio": round(ratio, 3)
+        }
+    return {"threshold": threshold, "passed": not failed, "cases": cases}, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark OblivionBuildComposer and check for regressions")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE_PATH, metavar="PATH",
+                        help=f"store this run as the baseline (default {DEFAULT_BASELINE_PATH})")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE_PATH, metavar="PATH",
+                        help="compare this run with a stored baseline; exits 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction of the baseline time")
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--min-time", type=float, default=0.01, help="seconds per timed loop")
+    parser.add_argument("--rounds", type=int, default=5, help="interleaved passes over all cases")
+    parser.add_argument("--only", help="run only cases whose name contains this text")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write this run's JSON here")
+    args = parser.parse_args()
+
+    report = run_benchmarks(seed=args.seed, repeats=args.repeats, min_time=args.min_time, rounds=args.rounds,
+                            only=args.only)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"✅ Saved composer baseline to {args.save_baseline}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparison, failed = compare(baseline, report, args.threshold)
+        print(json.dumps(comparison, indent=2))
+        if failed:
+            flagged = [name for name, case in comparison["cases"].items()
+                       if case["status"] in ("regression", "output_changed")]
+            print(f"Warning: {len(flagged)} composer case(s) regressed: {', '.join(flagged)}", file=sys.stderr)
+            sys.exit(1)
+    elif not args.save_baseline:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Load Test for BuildCraft AI
+Drives /search and /build on the in-process FastAPI app at a fixed
+concurrency and reports throughput, tail latency and CPU time as JSON
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stand_ins import FakeEncoder, FakePineconeIndex  # noqa: E402
+
+ENDPOINTS = ("search", "search_batch", "build")
+BATCH_SIZE = 8  # queries per /search/batch request
+
+SEARCH_TEMPLATES = [
+    "{tag} {tag2} gear",
+    "best {tag} items for a {archetype}",
+    "{tag} {category}",
+    "something {tag} for a {archetype} build",
+]
+BUILD_TEMPLATES = [
+    "I want to play a {adjective} {archetype}",
+    "a {adjective} {archetype} who uses {tag} and {tag2} magic",
+    "build me a {archetype} focused on {tag} with {adjective} tactics",
+    "{adjective} {archetype}",
+]
+ARCHETYPES = ["mage", "warrior", "thief", "assassin", "archer", "paladin", "battlemage", "spellsword",
+              "necromancer", "tank", "healer", "nightblade"]
+ADJECTIVES = ["sneaky", "heavily armored", "aggressive", "defensive", "stealthy", "powerful", "agile",
+              "holy", "dark", "nature loving", "fire wielding", "frost"]
+
+
+def make_workload(game_data: Dict[str, List[Dict[str, Any]]], count: int,
+                  seed: int = 0) -> Dict[str, List[Any]]:
+    """Deterministic request bodies for each endpoint
+
+    About a fifth of searches are exact item names (the keyword fast path) and
+    about a third carry a category filter.
+    """
+    rng = random.Random(seed)
+    names = [item["name"] for items in game_data.values() for item in items]
+    tags = sorted({tag for items in game_data.values() for item in items for tag in item.get("tags", [])})
+    categories = sorted(game_data)
+
+    def fill(template: str) -> str:
+        return template.format(tag=rng.choice(tags), tag2=rng.choice(tags), archetype=rng.choice(ARCHETYPES),
+                               adjective=rng.choice(ADJECTIVES), category=rng.choice(categories))
+
+    searches = []
+    for _ in range(count):
+        if rng.random() < 0.2:
+            body: Dict[str, Any] = {"query": rng.choice(names)}
+        else:
+            body = {"query": fill(rng.choice(SEARCH_TEMPLATES)), "limit": rng.choice([5, 5, 10])}
+            if rng.random() < 0.33:
+                body["category"] = rng.choice(categories)
+        searches.append(body)
+
+    builds = []
+    for _ in range(count):
+        body = {"prompt": fill(rng.choice(BUILD_TEMPLATES))}
+        if rng.random() < 0.5:
+            body["playstyle"] = rng.choice(["aggressive", "defensive", "balanced", "stealthy"])
+        builds.append(body)
+
+    batches = [searches[i:i + BATCH_SIZE] for i in range(0, len(searches), BATCH_SIZE)]
+    return {"search": searches, "search_batch": batches, "build": builds}
+
+
+async def asgi_request(app, method: str, path: str, body: Any = None) -> Tuple[int, bytes]:
+    """Call an ASGI app directly, without sockets or an HTTP client"""
+    payload = json.dumps(body).encode("utf-8") if body is not None else b""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode("ascii"), "query_string": b"",
+        "root_path": "", "client": ("127.0.0.1", 0), "server": ("benchmark", 80),
+        "headers": [(b"host", b"benchmark"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode("ascii"))]
+    }
+    disconnected = asyncio.Event()
+    sent_body = False
+    status = 0
+    chunks: List[bytes] = []
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        disconnected.set()
+    return status, b"".join(chunks)
+
+
+def summarize(latencies: List[float], errors: int, wall_seconds: float,
+              cpu: Tuple[float, float]) -> Dict[str, Any]:
+    """Throughput, latency percentiles (ms) and CPU time for one phase"""
+    completed = len(latencies)
+    latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if completed else (0.0, 0.0, 0.0)
+    cpu_seconds = cpu[0] + cpu[1]
+    return {
+        "requests": completed,
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 3),
+        "rps": round(completed / wall_seconds, 1) if wall_seconds else 0.0,
+        "latency_ms": {
+            "mean": round(float(latencies_ms.mean()), 3) if completed else 0.0,
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "max": round(float(latencies_ms.max()), 3) if completed else 0.0
+        },
+        "cpu_seconds": {"user": round(cpu[0], 3), "system": round(cpu[1], 3), "total": round(cpu_seconds, 3)},
+        "cpu_ms_per_request": round(cpu_seconds * 1000.0 / completed, 3) if completed else 0.0,
+        # CPU time over wall time; 1.0 means one core fully busy
+        "cpu_utilization": round(cpu_seconds / wall_seconds, 3) if wall_seconds else 0.0
+    }
+
+
+async def run_phase(app, path: str, bodies: List[Any], concurrency: int, warmup: int) -> Dict[str, Any]:
+    """Send every body once from `concurrency` concurrent clients; the first `warmup` are not measured"""
+    async def drive(requests: List[Any], record: Optional[Callable[[float, int], None]]) -> None:
+        position = 0
+
+        async def client() -> None:
+            nonlocal position
+            while position < len(requests):
+                body = requests[position]
+                position += 1
+                started = time.perf_counter()
+                status, _ = await asgi_request(app, "POST", path, body)
+                if record is not None:
+                    record(time.perf_counter() - started, status)
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+    await drive(bodies[:warmup], None)
+
+    latencies: List[float] = []
+    errors = 0
+
+    def record(seconds: float, status: int) -> None:
+        nonlocal errors
+        if status == 200:
+            latencies.append(seconds)
+        else:
+            errors += 1
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    await drive(bodies[warmup:], record)
+    wall_seconds = time.perf_counter() - started
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    return summarize(latencies, errors, wall_seconds,
+                     (after.ru_utime - usage.ru_utime, after.ru_stime - usage.ru_stime))
+
+
+def seed_extra_vectors(store, count: int, dimension: int, seed: int = 0, batch_size: int = 1000) -> None:
+    """Pad the index with random vectors under a prefix the service's sync leaves alone"""
+    rng = np.random.default_rng(seed)
+    categories = ["weapons", "armor", "spells", "potions", "ingredients", "books"]
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        vectors = rng.standard_normal((size, dimension)).astype(np.float32)
+        ids = [f"benchmark:{start + i}" for i in range(size)]
+        metadata = [
+            {"name": f"Benchmark Item {start + i}", "category": categories[(start + i) % len(categories)],
+             "type": "misc", "rarity": "common", "school": "", "description": "Synthetic benchmark item",
+             "tags": "synthetic,benchmark", "content_hash": "benchmark"}
+            for i in range(size)
+        ]
+        store.upsert(ids, vectors, metadata)
+
+
+def configure_service(args) -> Any:
+    """Import the service with benchmark configuration and stand-ins patched in"""
+    # The service reads its configuration from the environment at import time
+    os.environ["VECTOR_BACKEND"] = args.backend
+    os.environ["RESPONSE_CACHE_MB"] = os.environ.get("RESPONSE_CACHE_MB", "32") if args.response_cache else "0"
+    os.environ["EMBEDDING_CACHE_DIR"] = tempfile.mkdtemp(prefix="buildcraft-bench-")
+    os.environ["HYBRID_SEARCH"] = "true" if args.hybrid else "false"
+    for name in ("EMBEDDING_SERVER_SOCKET", "LOCAL_SNAPSHOT_DIR", "ANN_INDEX_PATH", "LOCAL_VECTOR_DIR"):
+        os.environ[name] = ""
+
+    import main
+    from vector_store import PineconeVectorStore, create_vector_store
+
+    encoder = FakeEncoder(dimension=main.EMBEDDING_DIMENSION, cost_ms=args.encode_ms)
+    main.create_encoder = lambda *_args, **_kwargs: encoder
+
+    def create_store(backend: str, **kwargs):
+        if backend == "pinecone":
+            store = PineconeVectorStore(FakePineconeIndex(kwargs["dimension"], latency_ms=args.index_latency_ms))
+        else:
+            store = create_vector_store(backend, **{**kwargs, "api_key": None})
+        seed_extra_vectors(store, args.extra_vectors, kwargs["dimension"], seed=args.seed)
+        return store
+
+    main.create_vector_store = create_store
+    return main
+
+
+async def run(args) -> Dict[str, Any]:
+    main = configure_service(args)
+    random.seed(args.seed)
+    workload = make_workload(main.OBLIVION_GAMEDATA, args.requests + args.warmup, seed=args.seed)
+    paths = {"search": "/search", "search_batch": "/search/batch", "build": "/build"}
+
+    results: Dict[str, Any] = {}
+    async with main.lifespan(main.app):
+        for endpoint in args.endpoints:
+            # Batch bodies carry BATCH_SIZE queries each, so fewer of them are sent
+            warmup = args.warmup // BATCH_SIZE if endpoint == "search_batch" else args.warmup
+            results[endpoint] = await run_phase(main.app, paths[endpoint], workload[endpoint],
+                                                args.concurrency, warmup)
+            if endpoint == "search_batch":
+                results[endpoint]["queries_per_request"] = BATCH_SIZE
+        service = {
+            "embedding_cache": main.embedding_cache.stats(),
+            "response_cache": main.response_cache.stats(),
+            "embedding_batcher": main.embedding_batcher.stats(),
+            "event_loop": main.loop_monitor.stats(),
+            "vector_count": main.vector_store.count()
+        }
+
+    return {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "backend": args.backend,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "encode_ms": args.encode_ms,
+            "index_latency_ms": args.index_latency_ms,
+            "extra_vectors": args.extra_vectors,
+            "response_cache": args.response_cache,
+            "hybrid_search": args.hybrid
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "results": results,
+        "service": service
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /search and /build in-process with local stand-ins")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=["search", "build"])
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests sent first")
+    parser.add_argument("--backend", choices=("pinecone", "local"), default="pinecone",
+                        help="pinecone uses the in-memory stand-in index")
+    parser.add_argument("--encode-ms", type=float, default=0.0, help="simulated model time per text")
+    parser.add_argument("--index-latency-ms", type=float, default=0.0,
+                        help="simulated round trip per stand-in index call")
+    parser.add_argument("--extra-vectors", type=int, default=0, help="random vectors added to the catalog")
+    parser.add_argument("--response-cache", action="store_true", help="keep the response cache enabled")
+    parser.add_argument("--no-hybrid", dest="hybrid", action="store_false", help="disable BM25 fusion")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="", help="free-form tag stored with the report")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    # Keep the service's startup logging off stdout so the report stays machine-readable
+    with contextlib.redirect_stdout(sys.stderr):
+        report = asyncio.run(run(args))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"✅ Wrote load test report to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
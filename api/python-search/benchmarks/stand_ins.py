@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark Stand-ins for BuildCraft AI
+Deterministic fake encoder and in-memory Pinecone index, so benchmarks run
+without a model download, a GPU or network access
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class FakeEncoder:
+    """Hashed bag-of-words embeddings with the Encoder interface
+
+    Each token adds +1 or -1 to one of `dimension` buckets chosen by its BLAKE2
+    digest, so texts sharing words score higher, and the same text always maps
+    to the same vector in every process. cost_ms simulates model time per text
+    with a sleep, like a model that releases the GIL while it runs.
+    """
+
+    def __init__(self, dimension: int = 384, cost_ms: float = 0.0):
+        self.dimension = dimension
+        self.cost_ms = cost_ms
+        self.model_name = "fake-hash-encoder"
+        self.cache_name = f"{self.model_name}-{dimension}"
+        self.texts = 0
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in _TOKEN_PATTERN.findall(text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dimension] += 1.0 if digest >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts: Union[str, Sequence[str]], **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        self.texts += len(batch)
+        if self.cost_ms:
+            time.sleep(self.cost_ms * len(batch) / 1000.0)
+        embeddings = np.stack([self._encode_one(text) for text in batch]) if batch else \
+            np.empty((0, self.dimension), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": "fake", "model": self.model_name, "cost_ms": self.cost_ms, "texts": self.texts}
+
+
+class FakePineconeIndex:
+    """In-memory stand-in for the pinecone Index calls used by PineconeVectorStore
+
+    Supports upsert, query (cosine, with $in / $eq / $and metadata filters),
+    delete, paginated list, fetch and describe_index_stats. latency_ms adds a
+    sleep to every call to model the network round trip.
+    """
+
+    def __init__(self, dimension: int = 384, latency_ms: float = 0.0, page_size: int = 100):
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.page_size = page_size
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._filter_rows: Dict[str, np.ndarray] = {}
+        self.calls: Dict[str, int] = {}
+
+    def _call(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+    def upsert(self, vectors: List[Dict[str, Any]]) -> None:
+        self._call("upsert")
+        with self._lock:
+            for vector in vectors:
+                values = np.asarray(vector["values"], dtype=np.float32)
+                norm = np.linalg.norm(values)
+                self._vectors[vector["id"]] = values / norm if norm else values
+                self._metadata[vector["id"]] = dict(vector.get("metadata") or {})
+            self._matrix = None
+
+    def delete(self, ids: List[str]) -> None:
+        self._call("delete")
+        with self._lock:
+            for vector_id in ids:
+                self._vectors.pop(vector_id, None)
+                self._metadata.pop(vector_id, None)
+            self._matrix = None
+
+    def list(self, prefix: str = "") -> Iterator[List[str]]:
+        self._call("list")
+        with self._lock:
+            ids = sorted(vector_id for vector_id in self._vectors if vector_id.startswith(prefix))
+        for start in range(0, len(ids), self.page_size):
+            yield ids[start:start + self.page_size]
+
+    def fetch(self, ids: List[str]) -> SimpleNamespace:
+        self._call("fetch")
+        with self._lock:
+            vectors = {
+                vector_id: SimpleNamespace(id=vector_id, values=self._vectors[vector_id].tolist(),
+                                           metadata=self._metadata[vector_id])
+                for vector_id in ids if vector_id in self._vectors
+            }
+        return SimpleNamespace(vectors=vectors)
+
+    def describe_index_stats(self) -> SimpleNamespace:
+        self._call("describe_index_stats")
+        return SimpleNamespace(dimension=self.dimension, total_vector_count=len(self._vectors))
+
+    def query(self, vector: List[float], top_k: int = 10, include_metadata: bool = False,
+              filter: Optional[Dict[str, Any]] = None) -> SimpleNamespace:
+        self._call("query")
+        with self._lock:
+            if self._matrix is None:
+                self._ids = list(self._vectors)
+                self._matrix = np.stack([self._vectors[i] for i in self._ids]) if self._ids else \
+                    np.empty((0, self.dimension), dtype=np.float32)
+                self._filter_rows = {}
+            ids, matrix = self._ids, self._matrix
+            rows = np.arange(len(ids))
+            if filter:
+                # Filtered row sets are reused until the index changes
+                key = json.dumps(filter, sort_keys=True)
+                if key not in self._filter_rows:
+                    self._filter_rows[key] = np.array(
+                        [row for row in rows if _matches(self._metadata[ids[row]], filter)], dtype=np.int64
+                    )
+                rows = self._filter_rows[key]
+
+        scores = matrix @ np.asarray(vector, dtype=np.float32)
+        if top_k < len(rows):
+            rows = rows[np.argpartition(-scores[rows], top_k - 1)[:top_k]]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return SimpleNamespace(matches=[
+            SimpleNamespace(id=ids[row], score=float(scores[row]),
+                            metadata=self._metadata.get(ids[row]) if include_metadata else None)
+            for row in rows
+        ])
+
+
+def _matches(metadata: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    """Evaluate the subset of Pinecone's filter language the service generates
+
+    Values compare exactly, as in Pinecone, so "Weapons" does not match "weapons"
+    and a field the vector lacks matches nothing.
+    """
+    for field, condition in filter.items():
+        if field == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        if field not in metadata:
+            return False
+        value = metadata[field]
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+        elif value != condition:
+            return False
+    return True
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Index Sync Benchmark for BuildCraft AI
+Times sync_documents into the local vector store for synthetic catalogs:
+the first population, a re-sync with nothing changed, and a partial update
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index_sync import sync_documents  # noqa: E402
+from vector_store import STORAGE_MODES, LocalVectorStore  # noqa: E402
+
+CATEGORIES = ["weapons", "armor", "spells", "potions", "skills"]
+
+
+def synthetic_documents(count: int, revision: int = 0, changed: float = 0.0) -> List[Dict[str, Any]]:
+    """Documents shaped like the service's catalog; a `changed` share gets new text in this revision"""
+    step = int(1 / changed) if changed else 0
+    return [
+        {
+            "id": f"gamedata:{CATEGORIES[i % len(CATEGORIES)]}:item-{i}",
+            "text": f"Item {i} {CATEGORIES[i % len(CATEGORIES)]} revision {revision if step and i % step == 0 else 0}",
+            "metadata": {"name": f"Item {i}", "category": CATEGORIES[i % len(CATEGORIES)], "type": "misc"}
+        }
+        for i in range(count)
+    ]
+
+
+def precomputed_embeddings(dimension: int, seed: int = 0):
+    """embed() returning a fixed random vector per text, so timings leave out the model"""
+    rng = np.random.default_rng(seed)
+    vectors: Dict[str, np.ndarray] = {}
+
+    def embed(texts: List[str]) -> np.ndarray:
+        for text in texts:
+            if text not in vectors:
+                vectors[text] = rng.standard_normal(dimension).astype(np.float32)
+        return np.stack([vectors[text] for text in texts])
+
+    return embed
+
+
+def run_case(count: int, storage: str, dimension: int, index: str, source_dir: str) -> Dict[str, float]:
+    """Seconds for each sync phase against one fresh store"""
+    store = LocalVectorStore(dimension=dimension, storage=storage, source_dir=source_dir, index=index,
+                             ann_min_vectors=0)
+    embed = precomputed_embeddings(dimension)
+    initial = synthetic_documents(count)
+    # Revision 1 rewrites 10% of the documents and drops the last 5%
+    updated = synthetic_documents(count, revision=1, changed=0.1)[:count - count // 20]
+    embed([doc["text"] for doc in initial + updated])
+
+    timings = {}
+    for phase, documents in (("populate", initial), ("unchanged", initial), ("update", updated)):
+        started = time.perf_counter()
+        sync_documents(store, documents, "gamedata", embed)
+        store.build_index()
+        timings[phase] = time.perf_counter() - started
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time index sync into the local vector store")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 20000, 40000], help="catalog sizes")
+    parser.add_argument("--storage", nargs="+", choices=STORAGE_MODES, default=["float32", "int8", "binary"])
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--index", choices=("flat", "ivf"), default="flat",
+                        help="ivf also times building the ANN index after each sync")
+    parser.add_argument("--output", help="also write the results as JSON here")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="buildcraft-sync-bench-") as source_dir:
+        for storage in args.storage:
+            for count in args.sizes:
+                timings = run_case(count, storage, args.dimension, args.index, source_dir)
+                results[f"{storage}[vectors={count}]"] = timings
+                print(f"{storage:>8} {count:>7} vectors: " +
+                      ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timings.items()))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"dimension": args.dimension, "index": args.index, "cases": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,11 @@ from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 import re
 
+import numpy as np
+
+from candidate_scoring import ThemeCounter, select_top
+from keyword_matcher import KeywordMatcher
+
 
 @dataclass
 class BuildComponent:
@@ -22,9 +27,23 @@ class BuildComponent:
     metadata: Dict[str, Any] = None
 
 
+# compose_builds works through this many builds at a time, so a chunk's
+# intermediate results stay small
+COMPOSE_CHUNK_SIZE = 64
+
+
 class OblivionBuildComposer:
     """Composes dynamic character builds for Oblivion based on user preferences"""
     
+    # Gameplay vocabularies picked out of prompts by analyze_user_intent
+    MAGIC_SCHOOLS = ["destruction", "restoration", "illusion", "conjuration", "alteration", "mysticism"]
+    WEAPON_TYPES = ["sword", "bow", "staff", "dagger", "axe", "mace", "blade"]
+    ARMOR_WORDS = ["heavy", "light", "armor"]
+    SPECIAL_THEMES = ["fire", "ice", "poison", "shadow", "holy", "dark", "nature", "undead"]
+    
+    # Search result categories the composer draws from; anything else is misc
+    RESULT_CATEGORIES = ["skills", "weapons", "armor", "spells", "potions", "misc"]
+    
     def __init__(self):
         self.races_data = {
             "Altmer": {
@@ -126,10 +145,54 @@ class OblivionBuildComposer:
                 "description": "A heavily armored spellcaster who dominates the battlefield"
             }
         }
+        
+        self._compile_intent_vocabulary()
+        self._compile_race_affinity()
+        self._theme_counter = ThemeCounter()
+
+    def _compile_intent_vocabulary(self):
+        """Compile every intent keyword into one matcher, so a large vocabulary scans a prompt once"""
+        archetype_keywords = [keyword for data in self.build_archetypes.values() for keyword in data["keywords"]]
+        self._intent_matcher = KeywordMatcher(
+            archetype_keywords + self.MAGIC_SCHOOLS + self.WEAPON_TYPES + self.ARMOR_WORDS + self.SPECIAL_THEMES
+        )
+
+    def _compile_race_affinity(self):
+        """Compile races_data into a race x playstyle weight matrix and its inverted index
+
+        Call again after changing races_data.
+        """
+        self._race_names = tuple(self.races_data)
+        self._playstyle_columns: Dict[str, int] = {}
+        for race_data in self.races_data.values():
+            for playstyle in race_data["playstyles"]:
+                self._playstyle_columns.setdefault(playstyle, len(self._playstyle_columns))
+        
+        # Each matching playstyle is worth 2 points
+        self._race_affinity = np.zeros((len(self._race_names), len(self._playstyle_columns)), dtype=np.int64)
+        for row, race_data in enumerate(self.races_data.values()):
+            for playstyle in race_data["playstyles"]:
+                self._race_affinity[row, self._playstyle_columns[playstyle]] += 2
+        
+        # playstyle -> ((race row, weight), ...), the nonzero entries of its column
+        self._playstyle_races: Dict[str, Tuple[Tuple[int, int], ...]] = {
+            playstyle: tuple((int(row), int(self._race_affinity[row, column]))
+                             for row in np.flatnonzero(self._race_affinity[:, column]))
+            for playstyle, column in self._playstyle_columns.items()
+        }
+        
+        # 1 point for races with a magic skill when the intent asks for any school
+        magic_skills = {school.title() for school in self.MAGIC_SCHOOLS}
+        self._magic_race_bonus = [
+            int(any(skill in magic_skills for skill in race_data["skills"]))
+            for race_data in self.races_data.values()
+        ]
 
     def analyze_user_intent(self, prompt: str) -> Dict[str, Any]:
         """Analyze user prompt to extract playstyle preferences and themes"""
         prompt_lower = prompt.lower()
+        # Every vocabulary keyword occurring in the prompt
+        found = self._intent_matcher.find(prompt_lower)
         
         # Extract themes and keywords
         themes = []
@@ -139,7 +202,7 @@ class OblivionBuildComposer:
         for archetype, data in self.build_archetypes.items():
             score = 0
             for keyword in data["keywords"]:
-                if keyword in prompt_lower:
+                if keyword in found:
                     score += 1
             if score > 0:
                 playstyle_scores[archetype] = score
@@ -155,27 +218,24 @@ class OblivionBuildComposer:
         }
         
         # Magic schools
-        magic_schools = ["destruction", "restoration", "illusion", "conjuration", "alteration", "mysticism"]
-        for school in magic_schools:
-            if school in prompt_lower:
+        for school in self.MAGIC_SCHOOLS:
+            if school in found:
                 gameplay_elements["magic_schools"].append(school)
         
         # Weapon types
-        weapons = ["sword", "bow", "staff", "dagger", "axe", "mace", "blade"]
-        for weapon in weapons:
-            if weapon in prompt_lower:
+        for weapon in self.WEAPON_TYPES:
+            if weapon in found:
                 gameplay_elements["weapon_types"].append(weapon)
         
         # Armor preference
-        if "heavy" in prompt_lower and "armor" in prompt_lower:
+        if "heavy" in found and "armor" in found:
             gameplay_elements["armor_preference"] = "heavy"
-        elif "light" in prompt_lower and "armor" in prompt_lower:
+        elif "light" in found and "armor" in found:
             gameplay_elements["armor_preference"] = "light"
         
         # Special themes
-        special_themes = ["fire", "ice", "poison", "shadow", "holy", "dark", "nature", "undead"]
-        for theme in special_themes:
-            if theme in prompt_lower:
+        for theme in self.SPECIAL_THEMES:
+            if theme in found:
                 gameplay_elements["special_themes"].append(theme)
         
         return {
@@ -187,69 +247,156 @@ class OblivionBuildComposer:
 
     def recommend_race(self, intent: Dict[str, Any]) -> Dict[str, Any]:
         """Recommend the best race based on user intent"""
-        race_scores = {}
-        
-        for race_name, race_data in self.races_data.items():
-            score = 0
-            
-            # Check playstyle compatibility
-            for playstyle in race_data["playstyles"]:
-                if playstyle in intent["themes"]:
-                    score += 2
-            
-            # Check specific gameplay elements
-            if intent["gameplay_elements"]["magic_schools"]:
-                if any(school in race_data["skills"] for school in ["Destruction", "Restoration", "Illusion", "Conjuration", "Alteration", "Mysticism"]):
-                    score += 1
-            
-            race_scores[race_name] = score
-        
-        # Get the best race or random good option
-        if not race_scores or max(race_scores.values()) == 0:
+        # Sparse dot product of the intent's playstyle indicators with the race affinity matrix
+        if intent["gameplay_elements"]["magic_schools"]:
+            race_scores = list(self._magic_race_bonus)
+        else:
+            race_scores = [0] * len(self._race_names)
+        for theme in dict.fromkeys(intent["themes"]):
+            for row, weight in self._playstyle_races.get(theme, ()):
+                race_scores[row] += weight
+        
+        # Get the best race (the first listed on ties)
+        best = max(range(len(race_scores)), key=race_scores.__getitem__)
+        return self._recommended_race(best, race_scores[best])
+
+    def _race_scores(self, intents: List[Dict[str, Any]]) -> np.ndarray:
+        """recommend_race scores of every race for many intents at once, one row per intent"""
+        rows, columns = [], []
+        for row, intent in enumerate(intents):
+            for playstyle in self._playstyle_columns.keys() & intent["themes"]:
+                rows.append(row)
+                columns.append(self._playstyle_columns[playstyle])
+        
+        playstyles = np.zeros((len(intents), len(self._playstyle_columns)), dtype=np.int64)
+        playstyles[rows, columns] = 1
+        wants_magic = np.array([bool(intent["gameplay_elements"]["magic_schools"]) for intent in intents],
+                               dtype=np.int64)
+        return playstyles @ self._race_affinity.T + np.outer(wants_magic, self._magic_race_bonus)
+
+    def _recommended_race(self, best: int, score: int) -> Dict[str, Any]:
+        """The recommendation for the best-scoring race, or a random good option when no race scored"""
+        if score == 0:
             recommended_race = random.choice(list(self.races_data.keys()))
         else:
-            recommended_race = max(race_scores.keys(), key=race_scores.get)
+            recommended_race = self._race_names[best]
         
         return {
             "name": recommended_race,
             "data": self.races_data[recommended_race],
-            "score": race_scores.get(recommended_race, 0)
+            "score": score
         }
 
+    # Build response fields grouped into the sections emitted by iter_build_sections
+    BUILD_SECTIONS = [
+        ("race", ["race", "race_description"]),
+        ("skills", ["skills", "skill_details"]),
+        ("equipment", ["equipment"]),
+        ("spells", ["spells"]),
+        ("synergies", ["synergies"]),
+        ("overview", ["build_name", "playstyle", "reasoning", "roleplay_flavor", "progression"]),
+        ("tips", ["tips"])
+    ]
+
     def compose_build_from_search_results(self, intent: Dict[str, Any], search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Compose a creative build from semantic search results"""
-        
-        # Categorize search results
-        categorized_results = {
-            "skills": [],
-            "weapons": [],
-            "armor": [],
-            "spells": [],
-            "potions": [],
-            "misc": []
-        }
-        
-        for result in search_results:
-            category = result.get("category", "misc")
-            if category in categorized_results:
-                categorized_results[category].append(result)
-            else:
-                categorized_results["misc"].append(result)
+        build = {}
+        for _, section in self.iter_build_sections(intent, search_results):
+            build.update(section)
+        return build
+
+    def compose_builds(self, intents: List[Dict[str, Any]],
+                       result_sets: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Compose one build per (intent, search results) pair, returned in order
+
+        Gives the same builds, with the same draws from random, as calling
+        compose_build_from_search_results on each pair in turn, but scores the
+        races of a whole chunk of intents in one matrix product and categorizes
+        its result sets in one pass.
+        """
+        if len(intents) != len(result_sets):
+            raise ValueError(f"Got {len(intents)} intents but {len(result_sets)} result sets")
+        
+        builds = []
+        for start in range(0, len(intents), COMPOSE_CHUNK_SIZE):
+            end = start + COMPOSE_CHUNK_SIZE
+            builds.extend(self._compose_chunk(intents[start:end], result_sets[start:end]))
+        return builds
+
+    def _compose_chunk(self, intents: List[Dict[str, Any]],
+                       result_sets: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """compose_builds for one chunk of pairs"""
+        race_scores = self._race_scores(intents)
+        best_races = race_scores.argmax(axis=1).tolist()
+        best_scores = race_scores.max(axis=1).tolist()
+        
+        builds = []
+        for intent, search_results, categorized_results, best, score in zip(
+                intents, result_sets, self._categorize_result_sets(result_sets), best_races, best_scores):
+            build = {}
+            for _, section in self._iter_categorized_sections(intent, categorized_results, len(search_results),
+                                                              self._recommended_race(best, score)):
+                build.update(section)
+            builds.append(build)
+        return builds
+
+    def _categorize_result_sets(self, result_sets: List[List[Dict[str, Any]]]) -> List[Dict[str, List]]:
+        """Split each result set by category, keeping result order within a category"""
+        categorized = []
+        for search_results in result_sets:
+            categorized_results = {category: [] for category in self.RESULT_CATEGORIES}
+            misc = categorized_results["misc"]
+            for result in search_results:
+                categorized_results.get(result.get("category", "misc"), misc).append(result)
+            categorized.append(categorized_results)
+        return categorized
+
+    def iter_build_sections(self, intent: Dict[str, Any], search_results: List[Dict[str, Any]],
+                            recommended_race: Optional[Dict[str, Any]] = None):
+        """Compose a build section by section, yielding (section_name, fields) as each is ready
+
+        Pass a recommended_race from recommend_race to reuse a race that was
+        already chosen (and streamed) before the search results arrived.
+        """
+        categorized_results = self._categorize_result_sets([search_results])[0]
+        return self._iter_categorized_sections(intent, categorized_results, len(search_results), recommended_race)
+
+    def _iter_categorized_sections(self, intent: Dict[str, Any], categorized_results: Dict[str, List],
+                                   result_count: int, recommended_race: Optional[Dict[str, Any]] = None):
+        """iter_build_sections for search results already split by category"""
         
         # Recommend race
-        recommended_race = self.recommend_race(intent)
+        if recommended_race is None:
+            recommended_race = self.recommend_race(intent)
+        yield "race", {
+            "race": recommended_race["name"],
+            "race_description": recommended_race["data"]["description"]
+        }
         
         # Select core skills (5-7 skills)
         primary_skills = self._select_primary_skills(categorized_results["skills"], intent)
+        yield "skills", {
+            "skills": [skill["name"] for skill in primary_skills[:7]],
+            "skill_details": primary_skills[:7]
+        }
         
         # Select equipment
         equipment = self._select_equipment(categorized_results, intent)
+        yield "equipment", {
+            "equipment": {
+                "weapons": [item["name"] for item in equipment["weapons"][:3]],
+                "armor": [item["name"] for item in equipment["armor"][:5]],
+                "accessories": [item["name"] for item in equipment.get("accessories", [])[:3]]
+            }
+        }
         
         # Select spells
         spells = self._select_spells(categorized_results["spells"], intent)
+        yield "spells", {"spells": [spell["name"] for spell in spells[:5]]}
         
         # Generate synergies
         synergies = self._generate_synergies(primary_skills, equipment, spells, intent)
+        yield "synergies", {"synergies": synergies}
         
         # Generate roleplay flavor
         flavor = self._generate_roleplay_flavor(recommended_race, intent, primary_skills)
@@ -260,25 +407,15 @@ class OblivionBuildComposer:
         # Generate build name
         build_name = self._generate_build_name(intent, recommended_race)
         
-        return {
+        yield "overview", {
             "build_name": build_name,
-            "race": recommended_race["name"],
-            "race_description": recommended_race["data"]["description"],
-            "skills": [skill["name"] for skill in primary_skills[:7]],
-            "skill_details": primary_skills[:7],
-            "equipment": {
-                "weapons": [item["name"] for item in equipment["weapons"][:3]],
-                "armor": [item["name"] for item in equipment["armor"][:5]],
-                "accessories": [item["name"] for item in equipment.get("accessories", [])[:3]]
-            },
-            "spells": [spell["name"] for spell in spells[:5]],
             "playstyle": self._generate_playstyle_description(intent),
-            "reasoning": self._generate_reasoning(intent, len(search_results)),
-            "synergies": synergies,
-            "progression": progression,
+            "reasoning": self._generate_reasoning(intent, result_count),
             "roleplay_flavor": flavor,
-            "tips": self._generate_gameplay_tips(intent, primary_skills, equipment)
+            "progression": progression
         }
+        
+        yield "tips", {"tips": self._generate_gameplay_tips(intent, primary_skills, equipment)}
 
     def _select_primary_skills(self, skills_results: List[Dict[str, Any]], intent: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Select primary skills based on search results and intent"""
@@ -292,25 +429,20 @@ class OblivionBuildComposer:
                 return [{"name": skill, "category": "skills", "score": 1.0} 
                        for skill in ["Blade", "Light Armor", "Athletics", "Restoration", "Sneak"]]
         
-        # Score and sort skills
-        scored_skills = []
-        for skill in skills_results:
-            score = skill.get("score", 0.5)
-            
-            # Boost score based on intent themes
-            for theme in intent["themes"]:
-                if theme.lower() in skill["name"].lower():
-                    score += 0.3
-            
-            scored_skills.append({
-                "name": skill["name"],
-                "category": skill["category"],
-                "score": score,
-                "properties": skill.get("properties", {})
-            })
+        # Score skills: +0.3 per intent theme found in the name, then keep the best 7
+        names = [skill["name"] for skill in skills_results]
+        base_scores = [skill.get("score", 0.5) for skill in skills_results]
+        boosts = self._theme_counter.counts(names, [theme.lower() for theme in intent["themes"]])
         
-        # Sort by score and return top skills
-        return sorted(scored_skills, key=lambda x: x["score"], reverse=True)[:7]
+        return [
+            {
+                "name": skills_results[i]["name"],
+                "category": skills_results[i]["category"],
+                "score": score,
+                "properties": skills_results[i].get("properties", {})
+            }
+            for i, score in select_top(base_scores, [(boosts, 0.3)], 7)
+        ]
 
     def _select_equipment(self, categorized_results: Dict[str, List], intent: Dict[str, Any]) -> Dict[str, List]:
         """Select equipment based on search results and intent"""
@@ -320,15 +452,7 @@ class OblivionBuildComposer:
         weapons = categorized_results.get("weapons", [])
         if weapons:
             # Prefer weapons that match themes
-            scored_weapons = []
-            for weapon in weapons:
-                score = weapon.get("score", 0.5)
-                for theme in intent["themes"]:
-                    if theme in weapon["name"].lower():
-                        score += 0.4
-                scored_weapons.append({"name": weapon["name"], "score": score, "properties": weapon.get("properties", {})})
-            
-            equipment["weapons"] = sorted(scored_weapons, key=lambda x: x["score"], reverse=True)[:3]
+            equipment["weapons"] = self._top_candidates(weapons, intent["themes"], 0.4, 3)
         else:
             # Fallback weapons based on archetype
             archetype = intent.get("primary_archetype", "versatile")
@@ -342,16 +466,9 @@ class OblivionBuildComposer:
         # Select armor
         armor = categorized_results.get("armor", [])
         if armor:
-            scored_armor = []
-            for item in armor:
-                score = item.get("score", 0.5)
-                # Prefer armor that matches intent
-                if intent["gameplay_elements"]["armor_preference"]:
-                    if intent["gameplay_elements"]["armor_preference"] in item["name"].lower():
-                        score += 0.5
-                scored_armor.append({"name": item["name"], "score": score, "properties": item.get("properties", {})})
-            
-            equipment["armor"] = sorted(scored_armor, key=lambda x: x["score"], reverse=True)[:5]
+            # Prefer armor that matches intent
+            armor_preference = intent["gameplay_elements"]["armor_preference"]
+            equipment["armor"] = self._top_candidates(armor, [armor_preference] if armor_preference else [], 0.5, 5)
         else:
             # Fallback armor
             if intent["gameplay_elements"]["armor_preference"] == "heavy":
@@ -375,29 +492,36 @@ class OblivionBuildComposer:
             
             return default_spells[:5]
         
-        # Score spells based on intent
-        scored_spells = []
-        for spell in spells_results:
-            score = spell.get("score", 0.5)
-            
-            # Boost score for matching schools
-            spell_school = spell.get("school", "").lower()
-            if spell_school in intent["gameplay_elements"]["magic_schools"]:
-                score += 0.4
-            
-            # Boost score for matching themes
-            for theme in intent["themes"]:
-                if theme in spell["name"].lower():
-                    score += 0.3
-            
-            scored_spells.append({
-                "name": spell["name"],
-                "school": spell.get("school", "Unknown"),
+        # Score spells: +0.4 for a requested school, +0.3 per intent theme in the name
+        names = [spell["name"] for spell in spells_results]
+        base_scores = [spell.get("score", 0.5) for spell in spells_results]
+        magic_schools = intent["gameplay_elements"]["magic_schools"]
+        school_boosts = [int(spell.get("school", "").lower() in magic_schools) for spell in spells_results]
+        theme_boosts = self._theme_counter.counts(names, intent["themes"])
+        
+        return [
+            {
+                "name": spells_results[i]["name"],
+                "school": spells_results[i].get("school", "Unknown"),
                 "score": score,
-                "properties": spell.get("properties", {})
-            })
-        
-        return sorted(scored_spells, key=lambda x: x["score"], reverse=True)[:5]
+                "properties": spells_results[i].get("properties", {})
+            }
+            for i, score in select_top(base_scores, [(school_boosts, 0.4), (theme_boosts, 0.3)], 5)
+        ]
+
+    def _top_candidates(self, candidates: List[Dict[str, Any]], themes: List[str], boost: float,
+                        limit: int) -> List[Dict[str, Any]]:
+        """The best `limit` candidates after adding `boost` per theme found in the name"""
+        base_scores = [candidate.get("score", 0.5) for candidate in candidates]
+        boosts = self._theme_counter.counts([candidate["name"] for candidate in candidates], themes)
+        return [
+            {
+                "name": candidates[i]["name"],
+                "score": score,
+                "properties": candidates[i].get("properties", {})
+            }
+            for i, score in select_top(base_scores, [(boosts, boost)], limit)
+        ]
 
     def _generate_synergies(self, skills: List[Dict], equipment: Dict, spells: List[Dict], intent: Dict[str, Any]) -> List[str]:
         """Generate synergy descriptions"""
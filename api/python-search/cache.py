@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+In-Process Caches for BuildCraft AI
+Thread-safe, byte-bounded LRU caches for query embeddings and responses
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+
+def canonicalize_query(query: str, category: Optional[str] = None) -> str:
+    """Case-fold and collapse whitespace, appending the normalized category suffix"""
+    canonical = " ".join(query.casefold().split())
+    if category:
+        canonical_category = " ".join(category.casefold().split())
+        if canonical_category:
+            canonical = f"{canonical} {canonical_category}" if canonical else canonical_category
+    return canonical
+
+
+class LRUByteCache:
+    """Least-recently-used cache bounded by the total size of its values in bytes
+
+    Entries optionally expire ttl_seconds after they were stored.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value (marking it recently used) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] is not None and entry[2] <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= entry[1]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        """Store a value of the given size, evicting the oldest entries to fit"""
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class EmbeddingCache(LRUByteCache):
+    """LRU cache of query embeddings keyed by canonical query text"""
+
+    def get_or_encode(self, text: str, encode: Callable[[str], np.ndarray]) -> np.ndarray:
+        """Return the cached embedding for text, encoding and caching it on a miss"""
+        embedding = self.get(text)
+        if embedding is None:
+            embedding = self.put_embedding(text, encode(text))
+        return embedding
+
+    def put_embedding(self, text: str, embedding: np.ndarray) -> np.ndarray:
+        """Cache a freshly encoded embedding as a read-only float32 array and return it"""
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        self.put(text, embedding, embedding.nbytes + sys.getsizeof(text))
+        return embedding
+
+    def get_or_encode_many(self, texts: Sequence[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Return a matrix of embeddings for texts, encoding all misses in one batch"""
+        embeddings: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+        for text in dict.fromkeys(texts):
+            embedding = self.get(text)
+            if embedding is None:
+                missing.append(text)
+            else:
+                embeddings[text] = embedding
+
+        if missing:
+            encoded = np.asarray(encode(missing), dtype=np.float32)
+            for text, embedding in zip(missing, encoded):
+                embeddings[text] = self.put_embedding(text, embedding)
+
+        return np.stack([embeddings[text] for text in texts])
+
+
+class ResponseCache(LRUByteCache):
+    """TTL + LRU cache of endpoint responses tied to a catalog/index version
+
+    Every key includes the index version, and the whole cache is dropped as
+    soon as a lookup sees a newer version, so re-populating the index
+    invalidates all cached responses at once.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: Optional[float] = None):
+        super().__init__(max_bytes, ttl_seconds=ttl_seconds)
+        self.version: Optional[Hashable] = None
+
+    def _key(self, endpoint: str, version: Hashable, payload: Dict[str, Any]) -> tuple:
+        if version != self.version:
+            self.clear()
+            self.version = version
+        return (endpoint, version, json.dumps(payload, sort_keys=True))
+
+    def get_response(self, endpoint: str, version: Hashable, payload: Dict[str, Any]) -> Optional[Any]:
+        """Return the cached response for an endpoint request, if any"""
+        return self.get(self._key(endpoint, version, payload))
+
+    def put_response(self, endpoint: str, version: Hashable, payload: Dict[str, Any], response: Any) -> None:
+        """Cache a JSON-serializable response (or an already serialized body) for an endpoint request"""
+        size = len(response) if isinstance(response, bytes) else len(json.dumps(response))
+        self.put(self._key(endpoint, version, payload), response, size)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["version"] = self.version
+        return stats
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Candidate Scoring for BuildCraft AI
+Theme boosts and top-N selection for build composer candidates, with
+memoized name x theme matches and a NumPy path for large candidate lists
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from keyword_matcher import KeywordMatcher
+
+# Distinct theme lists kept compiled; intents draw themes from a small archetype
+# vocabulary, so the same few lists recur
+THEME_SET_CACHE_SIZE = 256
+
+# Names whose theme matches are remembered per theme list
+NAME_CACHE_SIZE = 65536
+
+# Below this many candidates, array set-up costs more than scoring in Python
+VECTORIZE_MIN_CANDIDATES = 64
+
+# (per-candidate boost counts, amount added per count), applied in order
+BoostStep = Tuple[Sequence[int], float]
+
+
+class ThemeCounter:
+    """How many theme listings occur (as substrings) in each lowercased candidate name
+
+    Each theme list is compiled once into a KeywordMatcher, and the matches of
+    every name seen with it are memoized, so scoring a candidate list costs
+    a dictionary lookup per name instead of a substring scan per name and theme.
+    """
+
+    def __init__(self):
+        self._theme_lists: Dict[Tuple[str, ...], Tuple[KeywordMatcher, Dict[str, int], Dict[str, int]]] = {}
+
+    def _compile(self, themes: Tuple[str, ...]) -> Tuple[KeywordMatcher, Dict[str, int], Dict[str, int]]:
+        multiplicity: Dict[str, int] = {}
+        for theme in themes:
+            multiplicity[theme] = multiplicity.get(theme, 0) + 1
+        if len(self._theme_lists) >= THEME_SET_CACHE_SIZE:
+            self._theme_lists.clear()
+        entry = self._theme_lists[themes] = (KeywordMatcher(multiplicity), multiplicity, {})
+        return entry
+
+    def counts(self, names: Sequence[str], themes: Sequence[str]) -> List[int]:
+        """Per name, the number of entries in themes contained in name.lower()"""
+        if not themes:
+            return [0] * len(names)
+        themes = tuple(themes)
+        matcher, multiplicity, name_counts = self._theme_lists.get(themes) or self._compile(themes)
+
+        counts = [name_counts.get(name) for name in names]
+        if None in counts:
+            for i, name in enumerate(names):
+                if counts[i] is None:
+                    # The empty theme is contained in every name
+                    counts[i] = multiplicity.get("", 0) + sum(
+                        multiplicity[theme] for theme in matcher.find(name.lower())
+                    )
+                    if len(name_counts) >= NAME_CACHE_SIZE:
+                        name_counts.clear()
+                    name_counts[name] = counts[i]
+        return counts
+
+
+def select_top(base_scores: Sequence[Any], boosts: Sequence[BoostStep], limit: int) -> List[Tuple[int, Any]]:
+    """(index, score) of the `limit` best candidates after boosting, best first
+
+    Matches boosting each score with repeated `score += amount` and a stable
+    descending sort cut to `limit`: ties keep input order, boosted scores are
+    the same floats, and unboosted ones keep their original value and type.
+    """
+    if len(base_scores) < VECTORIZE_MIN_CANDIDATES:
+        scores = list(base_scores)
+        for counts, amount in boosts:
+            if any(counts):
+                for i, count in enumerate(counts):
+                    for _ in range(count):
+                        scores[i] += amount
+        order = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+        return [(i, scores[i]) for i in order[:limit]]
+
+    scores = np.array(base_scores, dtype=np.float64)
+    boosted = np.zeros(len(scores), dtype=bool)
+    for counts, amount in boosts:
+        counts = np.asarray(counts, dtype=np.int64)
+        scores = add_boost(scores, counts, amount)
+        boosted |= counts > 0
+    return [
+        (int(i), float(scores[i]) if boosted[i] else base_scores[i])
+        for i in top_n(scores, limit)
+    ]
+
+
+def add_boost(scores: np.ndarray, counts: np.ndarray, amount: float) -> np.ndarray:
+    """Add amount to each score once per count
+
+    np.add.at is unbuffered: an index repeated `count` times is added to
+    `count` times in sequence, so every result is bit-for-bit the float that
+    repeated `score += amount` produces.
+    """
+    boosted = scores.copy()
+    np.add.at(boosted, np.repeat(np.arange(len(scores)), counts), amount)
+    return boosted
+
+
+def top_n(scores: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the n highest scores, highest first, with ties in input order
+
+    Same order as a stable descending sort cut to n, but only the n winners
+    are sorted.
+    """
+    count = len(scores)
+    if n <= 0 or count == 0:
+        return np.empty(0, dtype=np.int64)
+    if n >= count:
+        return np.argsort(-scores, kind="stable")
+
+    threshold = np.partition(scores, count - n)[count - n]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:n - len(above)]
+    chosen = np.concatenate([above, ties])
+    chosen.sort()
+    return chosen[np.argsort(-scores[chosen], kind="stable")]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Persistent Embedding Cache for BuildCraft AI
+Content-addressed document embeddings stored as a memory-mapped .npy matrix,
+shared by the search service and the data ingestion pipeline
+"""
+
+import hashlib
+import os
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "EMBEDDING_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "cache", "embeddings")
+)
+
+KEY_SIZE = 20  # sha1 digest bytes
+
+
+class DiskEmbeddingCache:
+    """Embeddings keyed by a hash of (model name, document text)
+
+    Vectors live in `vectors.npy` (float32, one row per key) opened with
+    mmap_mode="r", and `keys.npy` holds the matching 20-byte digests. Only
+    documents whose text changed since the last run are sent to the encoder.
+    """
+
+    def __init__(self, model_name: str, cache_dir: Optional[str] = None):
+        self.model_name = model_name
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.directory = os.path.abspath(os.path.join(cache_dir or DEFAULT_CACHE_DIR, slug))
+        self.keys_path = os.path.join(self.directory, "keys.npy")
+        self.vectors_path = os.path.join(self.directory, "vectors.npy")
+        self._keys = np.empty(0, dtype=f"S{KEY_SIZE}")
+        self._vectors: Optional[np.ndarray] = None
+        self._index: Dict[bytes, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def key(self, text: str) -> bytes:
+        """Content address of a document for this model"""
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode("utf-8")).digest()
+
+    def _load(self) -> None:
+        if not (os.path.exists(self.keys_path) and os.path.exists(self.vectors_path)):
+            return
+        try:
+            keys = np.load(self.keys_path)
+            vectors = np.load(self.vectors_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable embedding cache in {self.directory}: {e}")
+            return
+        if len(keys) != len(vectors):
+            print(f"Warning: ignoring inconsistent embedding cache in {self.directory}")
+            return
+        self._keys = keys
+        self._vectors = vectors
+        # Indexing an "S" array strips trailing NUL bytes, so slice the raw buffer instead
+        raw = np.ascontiguousarray(keys).tobytes()
+        self._index = {raw[row * KEY_SIZE:(row + 1) * KEY_SIZE]: row for row in range(len(keys))}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def encode(self, texts: Sequence[str], encode: Callable[[List[str]], np.ndarray],
+               batch_size: int = 64) -> np.ndarray:
+        """Return embeddings for texts, encoding only texts not already cached"""
+        keys = [self.key(text) for text in texts]
+
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in self._index and key not in missing:
+                missing[key] = text
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+
+        if missing:
+            missing_texts = list(missing.values())
+            encoded = np.concatenate([
+                np.asarray(encode(missing_texts[i:i + batch_size]), dtype=np.float32)
+                for i in range(0, len(missing_texts), batch_size)
+            ])
+            self._append(list(missing.keys()), encoded)
+
+        if not texts:
+            dimension = self._vectors.shape[1] if self._vectors is not None else 0
+            return np.empty((0, dimension), dtype=np.float32)
+        rows = np.fromiter((self._index[key] for key in keys), dtype=np.int64, count=len(keys))
+        return np.ascontiguousarray(self._vectors[rows], dtype=np.float32)
+
+    def _append(self, keys: List[bytes], vectors: np.ndarray) -> None:
+        """Write old and new rows to fresh files, then swap them into place"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            # Pick up rows another process may have written meanwhile
+            self._load()
+            fresh = [i for i, key in enumerate(keys) if key not in self._index]
+            if not fresh:
+                return
+            new_keys = np.array([keys[i] for i in fresh], dtype=f"S{KEY_SIZE}")
+            new_vectors = vectors[fresh]
+
+            old_count = len(self._keys)
+            dimension = new_vectors.shape[1]
+            tmp_vectors_path = self.vectors_path + ".tmp.npy"
+            merged = np.lib.format.open_memmap(
+                tmp_vectors_path, mode="w+", dtype=np.float32, shape=(old_count + len(fresh), dimension)
+            )
+            if old_count:
+                merged[:old_count] = self._vectors
+            merged[old_count:] = new_vectors
+            merged.flush()
+            del merged
+
+            tmp_keys_path = self.keys_path + ".tmp.npy"
+            np.save(tmp_keys_path, np.concatenate([self._keys, new_keys]))
+            os.replace(tmp_vectors_path, self.vectors_path)
+            os.replace(tmp_keys_path, self.keys_path)
+            self._load()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
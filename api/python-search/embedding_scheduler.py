@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Embedding Scheduler for BuildCraft AI
+Collects concurrent single-query encode requests into micro-batches
+"""
+
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class EmbeddingBatcher:
+    """Dynamic micro-batching in front of a batch encode function
+
+    Requests wait at most max_wait_ms (or until max_batch_size texts are queued)
+    before the whole batch is encoded in one call on a worker thread. Pass an
+    executor to share an encode pool; otherwise a dedicated thread is used.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], max_batch_size: int = 32,
+                 max_wait_ms: float = 2.0, max_queue_depth: int = 1024,
+                 executor: Optional[Executor] = None):
+        self.encode_batch = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_queue_depth = max_queue_depth
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor = executor
+        self._owns_executor = executor is None
+
+        # Batch size histogram with power-of-two upper bounds
+        self._bucket_bounds = []
+        bound = 1
+        while bound < self.max_batch_size:
+            self._bucket_bounds.append(bound)
+            bound *= 2
+        self._bucket_bounds.append(self.max_batch_size)
+        self._bucket_counts = [0] * len(self._bucket_bounds)
+        self.batches = 0
+        self.items = 0
+
+    async def start(self) -> None:
+        """Start the batching worker on the running event loop"""
+        if self._worker is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_depth)
+        if self._owns_executor:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-batcher")
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker, failing any requests still queued"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding batcher stopped"))
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+        self._worker = None
+
+    async def encode(self, text: str) -> np.ndarray:
+        """Queue a single text and wait for its embedding"""
+        if self._worker is None:
+            raise RuntimeError("Embedding batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        """Wait for one request, then gather more until the batch is full or the window closes"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            pending = [(text, future) for text, future in batch if not future.cancelled()]
+            if not pending:
+                continue
+
+            self._record_batch(len(pending))
+            try:
+                embeddings = await loop.run_in_executor(
+                    self._executor, self.encode_batch, [text for text, _ in pending]
+                )
+                embeddings = np.asarray(embeddings, dtype=np.float32)
+            except asyncio.CancelledError:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Embedding batcher stopped"))
+                raise
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), embedding in zip(pending, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+    def _record_batch(self, size: int) -> None:
+        self.batches += 1
+        self.items += size
+        for i, bound in enumerate(self._bucket_bounds):
+            if size <= bound:
+                self._bucket_counts[i] += 1
+                break
+
+    def histogram(self) -> Tuple[List[int], List[int], int, int]:
+        """Batch size bucket bounds, per-bucket counts, total items and batch count"""
+        return list(self._bucket_bounds), list(self._bucket_counts), self.items, self.batches
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_queue_depth": self.max_queue_depth,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": {
+                f"le_{bound}": count for bound, count in zip(self._bucket_bounds, self._bucket_counts)
+            }
+        }
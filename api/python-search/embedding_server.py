@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Embedding Server for BuildCraft AI
+One process owns the sentence embedding model and batches encode requests
+from every API worker over a Unix socket; workers fall back to an in-process
+model when the server is unavailable
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence, Union
+
+import numpy as np
+
+# Wire format (all integers little-endian)
+#   request:  op u8, count u32, then count x (length u32, UTF-8 bytes)
+#   response: status u8, payload length u32, payload
+# OP_ENCODE payload: rows u32, dim u32, rows * dim float32
+# OP_INFO payload: JSON object; STATUS_ERROR payload: UTF-8 message
+OP_ENCODE = 1
+OP_INFO = 2
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+_REQUEST_HEADER = struct.Struct("<BI")
+_RESPONSE_HEADER = struct.Struct("<BI")
+_LENGTH = struct.Struct("<I")
+_MATRIX_HEADER = struct.Struct("<II")
+
+DEFAULT_SOCKET_PATH = "/tmp/buildcraft-embedding.sock"
+
+
+class EmbeddingServerUnavailable(ConnectionError):
+    """The embedding server could not be reached or failed mid-request"""
+
+
+def encode_request(op: int, texts: Sequence[str] = ()) -> bytes:
+    parts = [_REQUEST_HEADER.pack(op, len(texts))]
+    for text in texts:
+        data = text.encode("utf-8")
+        parts.append(_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def encode_matrix(matrix: np.ndarray) -> bytes:
+    matrix = np.ascontiguousarray(matrix, dtype="<f4")
+    return _MATRIX_HEADER.pack(*matrix.shape) + matrix.tobytes()
+
+
+def decode_matrix(payload: bytes) -> np.ndarray:
+    rows, dim = _MATRIX_HEADER.unpack_from(payload)
+    return np.frombuffer(payload, dtype="<f4", count=rows * dim, offset=_MATRIX_HEADER.size).reshape(rows, dim)
+
+
+class EmbeddingServer:
+    """Serves one encoder to many clients, micro-batching their requests together
+
+    Requests smaller than a batch go through an EmbeddingBatcher, so texts from
+    different workers share model calls; larger requests are encoded directly.
+    """
+
+    def __init__(self, encoder, socket_path: str = DEFAULT_SOCKET_PATH, max_batch_size: int = 32,
+                 max_wait_ms: float = 2.0, max_queue_depth: int = 1024):
+        from concurrent.futures import ThreadPoolExecutor
+        from embedding_scheduler import EmbeddingBatcher
+
+        self.encoder = encoder
+        self.socket_path = socket_path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-server")
+        self.batcher = EmbeddingBatcher(encoder.encode, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                                        max_queue_depth=max_queue_depth, executor=self.executor)
+        self.requests = 0
+        self.texts = 0
+        self.errors = 0
+        self.connections = 0
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "encoder": self.encoder.info(),
+            "cache_name": self.encoder.cache_name,
+            "requests": self.requests,
+            "texts": self.texts,
+            "errors": self.errors,
+            "connections": self.connections,
+            "batcher": self.batcher.stats()
+        }
+
+    async def serve_forever(self) -> None:
+        await self.batcher.start()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        print(f"✅ Embedding server listening on {self.socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+            self.executor.shutdown(wait=False)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    op, count = _REQUEST_HEADER.unpack(await reader.readexactly(_REQUEST_HEADER.size))
+                    texts = []
+                    for _ in range(count):
+                        (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                        texts.append((await reader.readexactly(length)).decode("utf-8"))
+                except asyncio.IncompleteReadError:
+                    return
+
+                try:
+                    if op == OP_ENCODE:
+                        payload = encode_matrix(await self._encode(texts))
+                    elif op == OP_INFO:
+                        payload = json.dumps(self.info()).encode("utf-8")
+                    else:
+                        raise ValueError(f"Unknown op {op}")
+                    status = STATUS_OK
+                except Exception as e:
+                    self.errors += 1
+                    status, payload = STATUS_ERROR, str(e).encode("utf-8")
+
+                writer.write(_RESPONSE_HEADER.pack(status, len(payload)) + payload)
+                await writer.drain()
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _encode(self, texts: List[str]) -> np.ndarray:
+        self.requests += 1
+        self.texts += len(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        if len(texts) >= self.batcher.max_batch_size:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self.encoder.encode, texts)
+        return np.stack(await asyncio.gather(*(self.batcher.encode(text) for text in texts)))
+
+
+class EmbeddingClient:
+    """Blocking client with one connection per calling thread"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 10.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.settimeout(self.timeout)
+            try:
+                conn.connect(self.socket_path)
+            except OSError:
+                conn.close()
+                raise
+            self._local.conn = conn
+        return conn
+
+    def _close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _call(self, request: bytes) -> bytes:
+        # Retry once on a fresh connection in case the server restarted
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.sendall(request)
+                status, length = _RESPONSE_HEADER.unpack(_recv_exactly(conn, _RESPONSE_HEADER.size))
+                payload = _recv_exactly(conn, length)
+                break
+            except OSError as e:
+                self._close()
+                if attempt:
+                    raise EmbeddingServerUnavailable(f"Embedding server at {self.socket_path}: {e}") from e
+        if status != STATUS_OK:
+            raise RuntimeError(f"Embedding server error: {payload.decode('utf-8', 'replace')}")
+        return payload
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return decode_matrix(self._call(encode_request(OP_ENCODE, texts)))
+
+    def info(self) -> Dict[str, Any]:
+        return json.loads(self._call(encode_request(OP_INFO)))
+
+
+def _recv_exactly(conn: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        chunk = conn.recv_into(view[received:])
+        if chunk == 0:
+            raise ConnectionResetError("Embedding server closed the connection")
+        received += chunk
+    return bytes(buffer)
+
+
+class RemoteEncoder:
+    """Encoder interface backed by the embedding server, with in-process fallback
+
+    load_fallback builds a local encoder; it is called at startup when the
+    server is unreachable, or on the first failed request. While falling back,
+    the server is retried every retry_seconds.
+    """
+
+    def __init__(self, socket_path: str, load_fallback: Callable[[], Any], retry_seconds: float = 30.0,
+                 timeout: float = 10.0):
+        self.client = EmbeddingClient(socket_path, timeout=timeout)
+        self.socket_path = socket_path
+        self.retry_seconds = retry_seconds
+        self._load_fallback = load_fallback
+        self._fallback = None
+        self._fallback_lock = threading.Lock()
+        self._retry_at = 0.0
+        self.fallback_encodes = 0
+
+        try:
+            self.server_info = self.client.info()
+            print(f"✅ Using embedding server at {socket_path} ({self.server_info['cache_name']})")
+        except EmbeddingServerUnavailable as e:
+            print(f"Warning: {e}; encoding in-process instead")
+            self.server_info = None
+            self._use_fallback()
+
+    @property
+    def model_name(self) -> str:
+        if self.server_info is not None:
+            return self.server_info["encoder"]["model"]
+        return self._use_fallback().model_name
+
+    @property
+    def cache_name(self) -> str:
+        if self.server_info is not None:
+            return self.server_info["cache_name"]
+        return self._use_fallback().cache_name
+
+    def _use_fallback(self):
+        with self._fallback_lock:
+            if self._fallback is None:
+                self._fallback = self._load_fallback()
+            self._retry_at = time.monotonic() + self.retry_seconds
+        return self._fallback
+
+    def encode(self, texts: Union[str, Sequence[str]], **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+
+        embeddings = None
+        if self._fallback is None or time.monotonic() >= self._retry_at:
+            try:
+                embeddings = self.client.encode(batch)
+            except EmbeddingServerUnavailable as e:
+                print(f"Warning: {e}; encoding in-process until it is back")
+        if embeddings is None:
+            self.fallback_encodes += len(batch)
+            embeddings = self._use_fallback().encode(batch)
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "backend": "server",
+            "socket": self.socket_path,
+            "server": self.server_info["encoder"] if self.server_info is not None else None,
+            "fallback_loaded": self._fallback is not None,
+            "fallback_encodes": self.fallback_encodes
+        }
+
+
+def main():
+    from encoders import ENCODER_BACKENDS, create_encoder
+
+    parser = argparse.ArgumentParser(description="Serve sentence embeddings to every API worker over a Unix socket")
+    parser.add_argument("--socket", default=os.getenv("EMBEDDING_SERVER_SOCKET", DEFAULT_SOCKET_PATH))
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backend", choices=ENCODER_BACKENDS, default=os.getenv("ENCODER_BACKEND", "torch"))
+    parser.add_argument("--threads", type=int, default=int(os.getenv("ENCODER_THREADS", "0")))
+    parser.add_argument("--onnx-file", default=os.getenv("ENCODER_ONNX_FILE"))
+    parser.add_argument("--max-batch-size", type=int, default=int(os.getenv("EMBED_BATCH_MAX_SIZE", "32")))
+    parser.add_argument("--max-wait-ms", type=float, default=float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "2")))
+    args = parser.parse_args()
+
+    encoder = create_encoder(args.backend, args.model, args.threads, args.onnx_file)
+    server = EmbeddingServer(encoder, args.socket, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
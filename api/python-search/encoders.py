@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Embedding Encoders for BuildCraft AI
+Selectable CPU inference backends for the sentence embedding model, plus a
+parity check against the reference fp32 PyTorch encoder
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+ENCODER_BACKENDS = ("torch", "quantized", "onnx")
+
+
+class Encoder:
+    """Wraps a SentenceTransformer so every backend encodes the same way
+
+    encode(str) returns one float32 vector and encode(list) returns a float32
+    matrix, matching SentenceTransformer.encode.
+    """
+
+    def __init__(self, model, backend: str, model_name: str, threads: int = 0):
+        self.model = model
+        self.backend = backend
+        self.model_name = model_name
+        self.threads = threads
+
+    @property
+    def cache_name(self) -> str:
+        """Name for persistent caches; backends produce slightly different vectors"""
+        return self.model_name if self.backend == "torch" else f"{self.model_name}@{self.backend}"
+
+    def encode(self, texts: Union[str, Sequence[str]], **kwargs) -> np.ndarray:
+        kwargs.setdefault("show_progress_bar", False)
+        return np.asarray(self.model.encode(texts, **kwargs), dtype=np.float32)
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "model": self.model_name, "device": str(getattr(self.model, "device", "cpu")),
+                "threads": self.threads}
+
+
+def create_encoder(backend: str, model_name: str, threads: int = 0,
+                   onnx_file: Optional[str] = None) -> Encoder:
+    """Load model_name on the requested backend
+
+    torch:     reference fp32 PyTorch model, on a GPU when one is available
+    quantized: PyTorch with Linear layers dynamically quantized to int8
+    onnx:      exported ONNX graph run by onnxruntime (needs optimum[onnxruntime]);
+               onnx_file selects a pre-exported file such as a quantized variant
+    threads sets intra-op threads; 0 keeps the runtime default.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}', expected one of {', '.join(ENCODER_BACKENDS)}")
+
+    if backend in ("torch", "quantized"):
+        import torch
+        if threads > 0:
+            torch.set_num_threads(threads)
+        if backend == "torch":
+            # SentenceTransformer picks the device, so a GPU is used when there is one
+            model = SentenceTransformer(model_name)
+        else:
+            # Dynamic int8 quantization only runs on CPU
+            model = SentenceTransformer(model_name, device="cpu")
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    else:
+        import onnxruntime
+        session_options = onnxruntime.SessionOptions()
+        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            session_options.intra_op_num_threads = threads
+        model_kwargs = {"provider": "CPUExecutionProvider", "session_options": session_options}
+        if onnx_file:
+            model_kwargs["file_name"] = onnx_file
+        model = SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+    encoder = Encoder(model, backend, model_name, threads)
+    encoder.encode("warmup")  # pay lazy initialization before the first request
+    return encoder
+
+
+def _single_query_latency(encoder: Encoder, queries: Sequence[str], repeats: int) -> float:
+    """Median wall time in seconds of encoding one query at a time"""
+    timings = []
+    for _ in range(repeats):
+        for query in queries:
+            started = time.perf_counter()
+            encoder.encode(query)
+            timings.append(time.perf_counter() - started)
+    return float(np.median(timings))
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def parity_report(reference: Encoder, candidate: Encoder, queries: Sequence[str],
+                  corpus: Sequence[str], top_k: int = 5, repeats: int = 3) -> Dict[str, Any]:
+    """Compare a candidate encoder with the reference on the same texts
+
+    Reports cosine drift (1 - cosine similarity between the two encoders'
+    vectors), top-k retrieval overlap of queries against the corpus, and
+    median single-query encode latency of both encoders.
+    """
+    texts = list(queries) + list(corpus)
+    ref_vectors = _normalize_rows(reference.encode(texts))
+    cand_vectors = _normalize_rows(candidate.encode(texts))
+    drift = 1.0 - np.sum(ref_vectors * cand_vectors, axis=1)
+
+    k = min(top_k, len(corpus))
+    n = len(queries)
+    ref_ranked = np.argsort(-(ref_vectors[:n] @ ref_vectors[n:].T), axis=1, kind="stable")[:, :k]
+    cand_ranked = np.argsort(-(cand_vectors[:n] @ cand_vectors[n:].T), axis=1, kind="stable")[:, :k]
+    overlap = [len(set(ref) & set(cand)) / k for ref, cand in zip(ref_ranked, cand_ranked)] if k else [1.0]
+    top1 = float(np.mean(ref_ranked[:, 0] == cand_ranked[:, 0])) if k and n else 1.0
+
+    reference_latency = _single_query_latency(reference, queries, repeats)
+    candidate_latency = _single_query_latency(candidate, queries, repeats)
+
+    return {
+        "reference": reference.info(),
+        "candidate": candidate.info(),
+        "texts": len(texts),
+        "cosine_drift": {
+            "mean": float(np.mean(drift)),
+            "p99": float(np.percentile(drift, 99)),
+            "max": float(np.max(drift))
+        },
+        "retrieval": {
+            f"top{k}_overlap": float(np.mean(overlap)),
+            "top1_agreement": top1
+        },
+        "single_query_latency_ms": {
+            "reference": round(reference_latency * 1000.0, 3),
+            "candidate": round(candidate_latency * 1000.0, 3),
+            "speedup": round(reference_latency / candidate_latency, 2) if candidate_latency else None
+        }
+    }
+
+
+PARITY_QUERIES = [
+    "stealth archer",
+    "heavy armor warrior with a two-handed sword",
+    "fire destruction mage",
+    "healing spells for a paladin",
+    "sneaky thief who picks locks",
+    "battlemage using frost and a longsword",
+    "best bow for sneak attacks",
+    "light armor for an assassin",
+    "conjuration summoner build",
+    "potion of invisibility"
+]
+
+
+def _catalog_texts() -> List[str]:
+    from oblivion_gamedata import OBLIVION_GAMEDATA
+    return [
+        " ".join(filter(None, [item["name"], item.get("description", ""), " ".join(item.get("tags", []))]))
+        for items in OBLIVION_GAMEDATA.values() for item in items
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare an encoder backend against the fp32 PyTorch reference")
+    parser.add_argument("--backend", choices=ENCODER_BACKENDS, default="onnx")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0 = runtime default)")
+    parser.add_argument("--onnx-file", default=None, help="Pre-exported ONNX file inside the model repository")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    reference = create_encoder("torch", args.model, args.threads)
+    candidate = create_encoder(args.backend, args.model, args.threads, args.onnx_file)
+    report = parity_report(reference, candidate, PARITY_QUERIES, _catalog_texts(),
+                           top_k=args.top_k, repeats=args.repeats)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Incremental Index Sync for BuildCraft AI
+Stable, content-derived vector IDs and diff-based upserts/deletes, shared by
+the search service and the data ingestion pipeline
+"""
+
+import hashlib
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from vector_store import VectorStore
+
+
+def slugify(text: str) -> str:
+    """Lowercase ASCII slug used inside vector IDs"""
+    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return slug or "item"
+
+
+def content_hash(text: str, metadata: Dict[str, Any]) -> str:
+    """Hash of everything written for a document, used to detect changes"""
+    payload = json.dumps({"text": text, "metadata": metadata}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def assign_stable_ids(prefix: str, items: Sequence[tuple]) -> List[str]:
+    """Derive IDs from source prefix, category and item name
+
+    items is a sequence of (category, item) pairs. Unique names map to
+    `prefix:category:name-slug`, so reordering the catalog never changes an ID.
+    Items sharing a name within a category get a short hash of the item's own
+    content appended, and only exact duplicates fall back to an ordinal.
+    """
+    name_counts: Dict[tuple, int] = {}
+    for category, item in items:
+        key = (category, slugify(str(item.get("name", ""))))
+        name_counts[key] = name_counts.get(key, 0) + 1
+
+    ids = []
+    seen: Dict[str, int] = {}
+    for category, item in items:
+        slug = slugify(str(item.get("name", "")))
+        vector_id = f"{prefix}:{category}:{slug}"
+        if name_counts[(category, slug)] > 1:
+            item_hash = hashlib.sha1(json.dumps(item, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:10]
+            vector_id = f"{vector_id}-{item_hash}"
+        occurrence = seen.get(vector_id, 0)
+        seen[vector_id] = occurrence + 1
+        ids.append(vector_id if occurrence == 0 else f"{vector_id}-{occurrence + 1}")
+    return ids
+
+
+def sync_documents(store: VectorStore, documents: List[Dict[str, Any]], prefix: str,
+                   embed: Callable[[List[str]], np.ndarray], batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Bring every vector under prefix in line with documents
+
+    documents carry "id", "text" and "metadata". Only added or changed
+    documents are embedded and upserted, and IDs under the prefix that no
+    longer have a document are deleted. Writes go out in batches of
+    batch_size, by default the store's write_batch_size; a store without one
+    (the local store) gets a single upsert and a single delete.
+    """
+    existing = store.fetch_content_hashes(store.list_ids(f"{prefix}:"))
+
+    pending = []
+    for doc in documents:
+        doc_hash = content_hash(doc["text"], doc["metadata"])
+        if existing.get(doc["id"]) != doc_hash:
+            pending.append((doc, doc_hash))
+
+    desired_ids = {doc["id"] for doc in documents}
+    orphans = [vector_id for vector_id in existing if vector_id not in desired_ids]
+    batch_size = batch_size or store.write_batch_size or max(len(pending), len(orphans), 1)
+
+    if pending:
+        embeddings = embed([doc["text"] for doc, _ in pending])
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            store.upsert(
+                [doc["id"] for doc, _ in batch],
+                embeddings[i:i + batch_size],
+                [dict(doc["metadata"], content_hash=doc_hash) for doc, doc_hash in batch]
+            )
+
+    for i in range(0, len(orphans), batch_size):
+        store.delete(orphans[i:i + batch_size])
+
+    added = sum(1 for doc, _ in pending if doc["id"] not in existing)
+    return {
+        "added": added,
+        "updated": len(pending) - added,
+        "deleted": len(orphans),
+        "unchanged": len(documents) - len(pending)
+    }
+
+
+def legacy_ids(store: VectorStore, managed_prefixes: Sequence[str]) -> List[str]:
+    """IDs written before stable IDs were introduced (outside every managed prefix)"""
+    return [
+        vector_id for vector_id in store.list_ids()
+        if not any(vector_id.startswith(f"{prefix}:") for prefix in managed_prefixes)
+    ]
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Keyword Matching for BuildCraft AI
+Finds every keyword of a fixed vocabulary in a text with one trie-shaped
+regular expression, independent of how many keywords there are; small
+vocabularies keep the plain per-keyword substring test
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+# Distinct words whose matches are remembered between calls
+WORD_CACHE_SIZE = 8192
+
+# Vocabularies up to this size are matched with one `keyword in text` test per
+# keyword, which beats the trie until there are about this many keywords
+PLAIN_SCAN_MAX_KEYWORDS = 16
+
+
+class KeywordMatcher:
+    """The set of vocabulary keywords that occur in a text
+
+    Keywords are compiled into a single regular expression shaped like their
+    prefix trie, wrapped in a lookahead so it is tried at every position; its
+    cost follows the text length, not the vocabulary size. At each position
+    the trie matches the longest keyword starting there, and the keywords
+    that are prefixes of it are implied, so results equal `keyword in text`
+    for every keyword.
+
+    When no keyword contains whitespace, an occurrence always lies inside one
+    whitespace-separated word, so each distinct word is scanned once and
+    words seen before are answered from a cache (prompts repeat words).
+
+    Vocabularies of at most PLAIN_SCAN_MAX_KEYWORDS keywords skip the trie and
+    test each keyword with `in`, which is faster at that size.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(keyword for keyword in keywords if keyword))
+        self._word_hits: Dict[str, FrozenSet[str]] = {}
+
+        if not self.keywords:
+            self._pattern = re.compile(r"(?!)")
+        else:
+            self._pattern = re.compile(rf"(?=({_trie_pattern(self.keywords)}))")
+
+        self._split_words = not any(char.isspace() for keyword in self.keywords for char in keyword)
+        self._plain = len(self.keywords) <= PLAIN_SCAN_MAX_KEYWORDS
+
+        # Keywords found whenever the keyword itself is matched at a position
+        self._implied: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(prefix for prefix in self.keywords if keyword.startswith(prefix))
+            for keyword in self.keywords
+        }
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _scan(self, text: str) -> FrozenSet[str]:
+        found = set()
+        for keyword in set(self._pattern.findall(text)):
+            found.update(self._implied[keyword])
+        return frozenset(found)
+
+    def find(self, text: str) -> Set[str]:
+        """Every keyword occurring in text"""
+        if self._plain:
+            return {keyword for keyword in self.keywords if keyword in text}
+        if not self._split_words:
+            return set(self._scan(text))
+
+        words = set(text.split())
+        cache = self._word_hits
+        try:
+            return set().union(*[cache[word] for word in words])
+        except KeyError:
+            pass
+
+        found = set()
+        for word in words:
+            hits = cache.get(word)
+            if hits is None:
+                hits = self._scan(word)
+                if len(cache) >= WORD_CACHE_SIZE:
+                    cache.clear()
+                cache[word] = hits
+            found |= hits
+        return found
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex source matching the longest of the keywords at the current position"""
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches: List[str] = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A keyword ends here: the rest is optional, and greedy so longer keywords win
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Lexical Search for BuildCraft AI
+In-memory BM25 inverted index over item names, tags and descriptions, with
+reciprocal-rank fusion for hybrid lexical + vector retrieval
+"""
+
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from vector_store import FILTER_FIELDS, MetadataFilter, VectorMatch
+
+# Term frequency weight of each indexed field (BM25F-style); names dominate
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "description": 1.0}
+
+# Reciprocal-rank fusion constant; larger values flatten the rank curve
+RRF_K = 60
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Case-folded alphanumeric tokens; apostrophes are dropped ("Mehrunes'" -> "mehrunes")"""
+    return _TOKEN_PATTERN.findall(text.casefold().replace("'", ""))
+
+
+def normalize_name(text: str) -> str:
+    """Canonical form used for exact item name lookups"""
+    return " ".join(tokenize(text))
+
+
+class BM25Index:
+    """Okapi BM25 over weighted name, tags and description fields
+
+    Postings hold, per term, the document numbers containing it and their
+    field-weighted term frequencies, so a query touches only its own terms.
+    """
+
+    def __init__(self, documents: Sequence[Dict[str, Any]], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._ids = [doc["id"] for doc in documents]
+        self._metadata = [doc["metadata"] for doc in documents]
+        self._names: Dict[str, List[int]] = {}
+
+        postings: Dict[str, Dict[int, float]] = {}
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for number, metadata in enumerate(self._metadata):
+            self._names.setdefault(normalize_name(str(metadata.get("name", ""))), []).append(number)
+            for field, weight in FIELD_WEIGHTS.items():
+                value = metadata.get(field) or ""
+                if isinstance(value, (list, tuple)):
+                    value = " ".join(value)
+                tokens = tokenize(str(value).replace(",", " "))
+                lengths[number] += weight * len(tokens)
+                for token in tokens:
+                    term = postings.setdefault(token, {})
+                    term[number] = term.get(number, 0.0) + weight
+
+        count = len(documents)
+        average_length = float(lengths.mean()) if count else 0.0
+        self._length_norm = k1 * (1 - b + b * lengths / average_length) if average_length else np.full(count, k1)
+        self._postings = {
+            token: (
+                np.fromiter(docs.keys(), dtype=np.int64, count=len(docs)),
+                np.fromiter(docs.values(), dtype=np.float32, count=len(docs)),
+                math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            )
+            for token, docs in postings.items()
+        }
+        self._field_values = {
+            field: np.array([str(metadata.get(field) or "").lower() for metadata in self._metadata])
+            for field in FILTER_FIELDS
+        }
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _filter_mask(self, filter: Optional[MetadataFilter]) -> Optional[np.ndarray]:
+        if not filter:
+            return None
+        mask = np.ones(len(self._ids), dtype=bool)
+        for field, values in filter.items():
+            mask &= np.isin(self._field_values[field], [str(value).lower() for value in values])
+        return mask
+
+    def search(self, query: str, top_k: int = 10, filter: Optional[MetadataFilter] = None) -> List[VectorMatch]:
+        """Best BM25 matches for the query terms, best first (ties keep catalog order)"""
+        scores = np.zeros(len(self._ids), dtype=np.float32)
+        for token in set(tokenize(query)):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            docs, frequencies, idf = posting
+            scores[docs] += idf * frequencies * (self.k1 + 1) / (frequencies + self._length_norm[docs])
+
+        mask = self._filter_mask(filter)
+        if mask is not None:
+            scores[~mask] = 0.0
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) == 0 or top_k <= 0:
+            return []
+        if top_k < len(matched):
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+            matched.sort()
+        ranked = matched[np.argsort(-scores[matched], kind="stable")]
+        return [VectorMatch(id=self._ids[i], score=float(scores[i]), metadata=self._metadata[i]) for i in ranked]
+
+    def exact_name_matches(self, query: str, filter: Optional[MetadataFilter] = None) -> List[VectorMatch]:
+        """Items whose whole name equals the query (case, spacing and apostrophes ignored)"""
+        numbers = self._names.get(normalize_name(query), [])
+        mask = self._filter_mask(filter)
+        return [
+            VectorMatch(id=self._ids[i], score=1.0, metadata=self._metadata[i])
+            for i in numbers if mask is None or mask[i]
+        ]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[VectorMatch]], top_k: int,
+                           k: int = RRF_K) -> List[VectorMatch]:
+    """Fuse ranked lists by summing 1 / (k + rank) per ID
+
+    Scores are scaled so an item ranked first in every list scores 1.0. Ties
+    keep the order in which IDs first appear, earlier lists first.
+    """
+    fused: Dict[str, float] = {}
+    metadata: Dict[str, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, match in enumerate(ranking, start=1):
+            fused[match.id] = fused.get(match.id, 0.0) + 1.0 / (k + rank)
+            metadata.setdefault(match.id, match.metadata)
+
+    best_possible = len(rankings) / (k + 1)
+    ordered = sorted(fused.items(), key=lambda item: -item[1])[:top_k]
+    return [
+        VectorMatch(id=vector_id, score=score / best_possible, metadata=metadata[vector_id])
+        for vector_id, score in ordered
+    ]
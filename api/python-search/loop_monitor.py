@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Event Loop Monitoring for BuildCraft AI
+Measures how late the asyncio event loop wakes up, as proof it is not blocked
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+
+
+class EventLoopLagMonitor:
+    """Periodically sleeps for a fixed interval and records how late it wakes up"""
+
+    def __init__(self, interval_ms: float = 100.0, histogram=None):
+        self.interval = interval_ms / 1000.0
+        self.histogram = histogram
+        self._task: Optional[asyncio.Task] = None
+        self.samples = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.samples += 1
+            self.last_lag = lag
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            if self.histogram is not None:
+                self.histogram.observe(lag)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_ms": self.interval * 1000.0,
+            "samples": self.samples,
+            "last_lag_ms": round(self.last_lag * 1000.0, 3),
+            "mean_lag_ms": round(self.total_lag / self.samples * 1000.0, 3) if self.samples else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000.0, 3)
+        }
@@ -6,20 +6,32 @@ Advanced semantic search and build recommendations for RPG games
 
 import os
 import json
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
-# Vector search imports
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone, ServerlessSpec
-
 # Local imports
+from encoders import create_encoder
+from embedding_server import RemoteEncoder
 from build_composer import OblivionBuildComposer
 from oblivion_gamedata import OBLIVION_GAMEDATA
+from vector_store import create_vector_store, snapshot_lock, MetadataFilter
+from disk_embedding_cache import DiskEmbeddingCache
+from index_sync import assign_stable_ids, sync_documents
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from autocomplete import DEFAULT_PROCESSED_DATA_PATH, PrefixIndex, catalog_names
+from payloads import ItemPayloads, dumps, json_array, ordered, search_response_body
+from cache import EmbeddingCache, ResponseCache, canonicalize_query
+from embedding_scheduler import EmbeddingBatcher
+from loop_monitor import EventLoopLagMonitor
+from metrics import MetricsRegistry, gauge_lines, histogram_lines
 
 # Load environment variables
 load_dotenv()
@@ -30,25 +42,83 @@ PINECONE_REGION = os.getenv("PINECONE_REGION", "us-east-1")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 INDEX_NAME = "oblivion-buildcraft"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_DIMENSION = 384  # all-MiniLM-L6-v2 dimension
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")  # torch, quantized or onnx
+ENCODER_THREADS = int(os.getenv("ENCODER_THREADS", "0"))  # intra-op threads, 0 = runtime default
+ENCODER_ONNX_FILE = os.getenv("ENCODER_ONNX_FILE")  # optional pre-exported ONNX file in the model repo
+EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET")  # shared embedding server; unset = in-process model
+GAMEDATA_ID_PREFIX = "gamedata"  # vector IDs owned by this service; the ingest script uses "processed"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone" if PINECONE_API_KEY else "local")
+LOCAL_VECTOR_STORAGE = os.getenv("LOCAL_VECTOR_STORAGE", "float32")  # float32, float16, int8 or binary
+LOCAL_VECTOR_RESCORE_FACTOR = int(os.getenv("LOCAL_VECTOR_RESCORE_FACTOR", "0"))  # 0 = per-mode default
+LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR")  # memory-mapped float32 vectors for rescoring
+LOCAL_VECTOR_INDEX = os.getenv("LOCAL_VECTOR_INDEX", "flat")  # flat or ivf
+ANN_NLIST = int(os.getenv("ANN_NLIST", "0"))  # 0 = about 1024 vectors per list
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "16"))
+ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", "50000"))  # smaller catalogs are scanned exhaustively
+ANN_INDEX_PATH = os.getenv("ANN_INDEX_PATH")  # persisted IVF index, reused while the catalog is unchanged
+LOCAL_SNAPSHOT_DIR = os.getenv("LOCAL_SNAPSHOT_DIR")  # memory-mapped index shared by every uvicorn worker
+EMBEDDING_CACHE_MB = float(os.getenv("EMBEDDING_CACHE_MB", "16"))
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "2"))
+EMBED_QUEUE_DEPTH = int(os.getenv("EMBED_QUEUE_DEPTH", "1024"))
+RESPONSE_CACHE_MB = float(os.getenv("RESPONSE_CACHE_MB", "32"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+PROCESSED_DATA_PATH = os.getenv("PROCESSED_DATA_PATH", DEFAULT_PROCESSED_DATA_PATH)  # extra autocomplete names
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() in ("1", "true", "yes")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # results taken from each retriever before fusion
+ENCODE_POOL_SIZE = int(os.getenv("ENCODE_POOL_SIZE", "2"))
+INDEX_POOL_SIZE = int(os.getenv("INDEX_POOL_SIZE", "8"))
+MAX_SEARCH_LIMIT = 100  # most results one /search request may ask for
+MAX_BATCH_QUERIES = 64  # most queries one /search/batch request may carry
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+# Catalog categories and item types that search filters can name
+CATALOG_CATEGORIES = frozenset(OBLIVION_GAMEDATA)
+CATALOG_TYPES = frozenset(
+    item.get("type", category).lower() for category, items in OBLIVION_GAMEDATA.items() for item in items
+)
+ANY_CATEGORY = frozenset({"item", "items", "all", "any"})
 
 # Global variables
-pc = None
-pinecone_index = None
+vector_store = None
+lexical_index = None
+autocomplete_index = None
+item_payloads = None
 embed_model = None
 build_composer = None
 game_data = None
+embedding_cache = EmbeddingCache(max_bytes=int(EMBEDDING_CACHE_MB * 1024 * 1024))
+response_cache = ResponseCache(
+    max_bytes=int(RESPONSE_CACHE_MB * 1024 * 1024),
+    ttl_seconds=RESPONSE_CACHE_TTL_SECONDS
+)
+embedding_batcher = None
+encode_pool = None
+index_pool = None
+metrics = MetricsRegistry()
+loop_monitor = EventLoopLagMonitor(histogram=metrics.histogram(
+    "event_loop_lag_seconds", "How late the event loop woke up for a periodic timer"
+))
 
 # Pydantic models
 class SearchRequest(BaseModel):
     query: str
     category: Optional[str] = None  # skills, weapons, armor, potions, spells
-    limit: Optional[int] = 5
+    limit: Optional[int] = Field(5, ge=1, le=MAX_SEARCH_LIMIT)
+    type: Optional[str] = None  # bow, blade, heavy, ...
+    rarity: Optional[str] = None  # common, rare, legendary, ...
+    school: Optional[str] = None  # destruction, restoration, ...
 
 class SearchResponse(BaseModel):
     results: List[Dict[str, Any]]
     reasoning: str
     suggestions: List[str]
 
+class AutocompleteResponse(BaseModel):
+    query: str
+    completions: List[Dict[str, str]]
+
 class BuildRequest(BaseModel):
     prompt: str
     playstyle: Optional[str] = None
@@ -69,36 +139,58 @@ class BuildResponse(BaseModel):
     roleplay_flavor: str
     tips: List[str]
 
+# Build responses are composed server-side, so they are serialized in field order without re-validation
+BUILD_RESPONSE_FIELDS = tuple(BuildResponse.model_fields)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize and cleanup resources"""
-    global pc, pinecone_index, embed_model, build_composer, game_data
+    global vector_store, lexical_index, autocomplete_index, item_payloads, embed_model, embedding_batcher, encode_pool, index_pool, build_composer, game_data
     
     # Startup
-    if not PINECONE_API_KEY:
-        raise ValueError("PINECONE_API_KEY environment variable is required")
-    
     if not OPENAI_API_KEY:
         print("Warning: OPENAI_API_KEY not set. Using local embeddings only.")
     
-    # Initialize Pinecone
-    pc = Pinecone(api_key=PINECONE_API_KEY)
+    # Initialize vector store (Pinecone or in-process NumPy)
+    print(f"Using {VECTOR_BACKEND} vector store backend")
+    vector_store = create_vector_store(
+        VECTOR_BACKEND,
+        dimension=EMBEDDING_DIMENSION,
+        api_key=PINECONE_API_KEY,
+        index_name=INDEX_NAME,
+        region=PINECONE_REGION,
+        storage=LOCAL_VECTOR_STORAGE,
+        rescore_factor=LOCAL_VECTOR_RESCORE_FACTOR,
+        source_dir=LOCAL_VECTOR_DIR,
+        index=LOCAL_VECTOR_INDEX,
+        nlist=ANN_NLIST,
+        nprobe=ANN_NPROBE,
+        ann_min_vectors=ANN_MIN_VECTORS,
+        index_path=ANN_INDEX_PATH
+    )
     
-    # Check if index exists
-    if INDEX_NAME not in pc.list_indexes().names():
-        print(f"Creating Pinecone index: {INDEX_NAME}")
-        pc.create_index(
-            name=INDEX_NAME,
-            dimension=384,  # all-MiniLM-L6-v2 dimension
-            metric="cosine",
-            spec=ServerlessSpec(cloud="aws", region=PINECONE_REGION)
-        )
+    # Initialize embedding model on the configured CPU backend, or use the shared embedding server
+    load_encoder = functools.partial(create_encoder, ENCODER_BACKEND, EMBEDDING_MODEL, ENCODER_THREADS, ENCODER_ONNX_FILE)
+    if EMBEDDING_SERVER_SOCKET:
+        embed_model = RemoteEncoder(EMBEDDING_SERVER_SOCKET, load_fallback=load_encoder)
+    else:
+        print(f"Using {ENCODER_BACKEND} encoder backend")
+        embed_model = load_encoder()
     
-    # Connect to index
-    pinecone_index = pc.Index(INDEX_NAME)
+    # Keep CPU-bound encoding and index I/O off the event loop
+    encode_pool = ThreadPoolExecutor(max_workers=ENCODE_POOL_SIZE, thread_name_prefix="encode")
+    index_pool = ThreadPoolExecutor(max_workers=INDEX_POOL_SIZE, thread_name_prefix="index")
     
-    # Initialize embedding model
-    embed_model = SentenceTransformer(EMBEDDING_MODEL)
+    # Micro-batch concurrent single-query encodes
+    embedding_batcher = EmbeddingBatcher(
+        embed_model.encode,
+        max_batch_size=EMBED_BATCH_MAX_SIZE,
+        max_wait_ms=EMBED_BATCH_MAX_WAIT_MS,
+        max_queue_depth=EMBED_QUEUE_DEPTH,
+        executor=encode_pool
+    )
+    await embedding_batcher.start()
+    await loop_monitor.start()
     
     # Initialize build composer
     build_composer = OblivionBuildComposer()
@@ -106,18 +198,23 @@ async def lifespan(app: FastAPI):
     # Load game data
     game_data = OBLIVION_GAMEDATA
     
-    # Check if database is already populated
+    # Keyword index over names, tags and descriptions for hybrid search
+    catalog_documents = build_catalog_documents(game_data)
+    lexical_index = BM25Index(catalog_documents)
+    
+    # Serialize every catalog item once; responses are assembled from these fragments
+    item_payloads = ItemPayloads(catalog_documents)
+    
+    # Sorted prefix index over every item, spell and skill name for /autocomplete
+    autocomplete_index = PrefixIndex(catalog_names(game_data, PROCESSED_DATA_PATH))
+    print(f"✅ Autocomplete index ready with {len(autocomplete_index)} names")
+    
+    # Bring the index in line with the game data (only changed items are written)
     try:
-        stats = pinecone_index.describe_index_stats()
-        total_vectors = stats.total_vector_count
-        if total_vectors > 0:
-            print(f"✅ Database already contains {total_vectors} vectors, skipping population")
-        else:
-            print("📊 Database empty, populating with game data...")
-            await populate_vector_database()
+        await populate_vector_database()
     except Exception as e:
-        print(f"Warning: Could not check database status: {e}")
-        print("Proceeding without population check...")
+        print(f"Warning: Could not sync vector database: {e}")
+        print("Proceeding with the index as it is...")
     
     print("✅ Search service initialized successfully!")
     
@@ -125,6 +222,10 @@ async def lifespan(app: FastAPI):
     
     # Shutdown (cleanup if needed)
     print("Shutting down search service...")
+    await embedding_batcher.stop()
+    await loop_monitor.stop()
+    encode_pool.shutdown(wait=False)
+    index_pool.shutdown(wait=False)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -148,185 +249,489 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "buildcraft-search"}
 
+@app.get("/autocomplete", response_model=AutocompleteResponse)
+async def autocomplete(q: str, limit: int = Query(8, ge=1, le=MAX_AUTOCOMPLETE_LIMIT), category: Optional[str] = None):
+    """Item, spell and skill names starting with the typed text (no model call)"""
+    with metrics.stage("autocomplete", "total"):
+        completions = autocomplete_index.complete(q, limit=limit, category=normalize_category(category))
+    return {"query": q, "completions": completions}
+
+@app.get("/stats")
+async def service_stats():
+    """Encoder, vector store, cache, embedding batcher and event loop statistics"""
+    return {
+        "encoder": embed_model.info(),
+        "vector_store": vector_store.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "event_loop": loop_monitor.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage latency histograms, cache and batching counters in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/search", response_model=SearchResponse)
 async def semantic_search(request: SearchRequest):
     """Semantic search for game items and skills"""
     try:
-        # Create enhanced query with category filter if specified
-        enhanced_query = request.query
-        if request.category:
-            enhanced_query += f" {request.category}"
-        
-        # Generate embedding for the query
-        query_embedding = embed_model.encode(enhanced_query).tolist()
-        
-        # Search in Pinecone
-        search_results = pinecone_index.query(
-            vector=query_embedding,
-            top_k=request.limit or 5,
-            include_metadata=True
-        )
-        
-        # Process results
-        results = []
-        for match in search_results.matches:
-            if match.metadata:
-                result_item = {
-                    "name": match.metadata.get("name", "Unknown"),
-                    "category": match.metadata.get("category", "unknown"),
-                    "type": match.metadata.get("type", "unknown"),
-                    "description": match.metadata.get("description", ""),
-                    "tags": match.metadata.get("tags", []),
-                    "properties": match.metadata.get("properties", {}),
-                    "score": round(match.score, 3)
-                }
+        with metrics.stage("search", "total"):
+            # Serve repeated queries straight from the response cache
+            cache_key = search_cache_key(request)
+            cached = response_cache.get_response("search", vector_store.version, cache_key)
+            if cached is not None:
+                return json_response(cached)
+            
+            # Exact item names are answered from the keyword index without encoding
+            with metrics.stage("search", "lexical"):
+                matches = exact_name_search(request)
+            
+            if matches is None:
+                # Create enhanced query with category filter if specified
+                enhanced_query = canonicalize_query(request.query, request.category)
                 
-                # Filter by category if requested
-                if request.category:
-                    if (request.category.lower() in result_item["category"].lower() or 
-                        request.category.lower() in result_item["type"].lower() or
-                        request.category.lower() in [tag.lower() for tag in result_item["tags"]]):
-                        results.append(result_item)
-                else:
-                    results.append(result_item)
-        
-        # Generate reasoning and suggestions
-        if results:
-            categories = set(result["category"] for result in results)
-            reasoning = f"Found {len(results)} relevant items across {len(categories)} categories: {', '.join(categories)}"
-        else:
-            reasoning = f"No items found matching '{request.query}'. Try different keywords or broader terms."
-        
-        suggestions = generate_suggestions(request.query, results)
-        
-        return SearchResponse(
-            results=results,
-            reasoning=reasoning,
-            suggestions=suggestions
-        )
+                # Generate embedding for the query
+                with metrics.stage("search", "encode"):
+                    query_embedding = await embed_query(enhanced_query)
+                
+                # Search the vector store, filtering inside the index
+                with metrics.stage("search", "index_query"):
+                    matches = await run_in_pool(
+                        index_pool, vector_store.query, query_embedding,
+                        top_k=search_depth(request), filter=search_filter(request)
+                    )
+                
+                with metrics.stage("search", "lexical"):
+                    matches = fuse_with_lexical(request, matches)
+            
+            with metrics.stage("search", "format"):
+                body = build_search_response(request, matches)
+            response_cache.put_response("search", vector_store.version, cache_key, body)
+            return json_response(body)
         
     except Exception as e:
+        metrics.count_error("search")
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 
+@app.post("/search/batch", response_model=List[SearchResponse])
+async def batch_search(requests: List[SearchRequest] = Body(..., max_length=MAX_BATCH_QUERIES)):
+    """Semantic search for many queries with one batched encode and index pass"""
+    try:
+        with metrics.stage("search_batch", "total"):
+            # Serve cached responses and only search for the rest
+            version = vector_store.version
+            cache_keys = [search_cache_key(request) for request in requests]
+            responses = [response_cache.get_response("search", version, key) for key in cache_keys]
+            pending = [i for i, response in enumerate(responses) if response is None]
+            
+            # Exact item names are answered from the keyword index without encoding
+            with metrics.stage("search_batch", "lexical"):
+                for i in list(pending):
+                    exact = exact_name_search(requests[i])
+                    if exact is not None:
+                        responses[i] = build_search_response(requests[i], exact)
+                        response_cache.put_response("search", version, cache_keys[i], responses[i])
+                        pending.remove(i)
+            if not pending:
+                return json_response(json_array(responses))
+            
+            # Encode every uncached query in a single batch
+            enhanced_queries = [canonicalize_query(requests[i].query, requests[i].category) for i in pending]
+            with metrics.stage("search_batch", "encode"):
+                query_embeddings = await run_in_pool(encode_pool, embed_queries, enhanced_queries)
+            metrics.batch_size("search_batch").observe(len(pending))
+            
+            # Multi-query top-k against the vector store, one pass per distinct filter
+            groups: Dict[tuple, List[int]] = {}
+            filters: Dict[tuple, Optional[MetadataFilter]] = {}
+            for row, i in enumerate(pending):
+                request_filter = search_filter(requests[i])
+                key = tuple(sorted((field, tuple(values)) for field, values in (request_filter or {}).items()))
+                groups.setdefault(key, []).append(row)
+                filters[key] = request_filter
+            
+            for key, rows in groups.items():
+                top_k = max(search_depth(requests[pending[row]]) for row in rows)
+                with metrics.stage("search_batch", "index_query"):
+                    group_matches = await run_in_pool(
+                        index_pool, vector_store.query_batch, query_embeddings[rows],
+                        top_k=top_k, filter=filters[key]
+                    )
+                for row, matches in zip(rows, group_matches):
+                    i = pending[row]
+                    matches = fuse_with_lexical(requests[i], matches[:search_depth(requests[i])])
+                    body = build_search_response(requests[i], matches)
+                    response_cache.put_response("search", version, cache_keys[i], body)
+                    responses[i] = body
+            
+            return json_response(json_array(responses))
+        
+    except Exception as e:
+        metrics.count_error("search_batch")
+        raise HTTPException(status_code=500, detail=f"Batch search error: {str(e)}")
+
 @app.post("/build", response_model=BuildResponse)
 async def generate_build(request: BuildRequest):
     """Generate build recommendations based on user preferences"""
     try:
-        # Analyze user intent
-        intent = build_composer.analyze_user_intent(request.prompt)
-        
-        # Create a comprehensive build query
-        build_query = f"{request.prompt} {request.playstyle or ''} {request.difficulty} {' '.join(intent['themes'])}"
-        
-        # Generate embedding for the build query
-        query_embedding = embed_model.encode(build_query).tolist()
-        
-        # Search in Pinecone for relevant items
-        search_results = pinecone_index.query(
-            vector=query_embedding,
-            top_k=30,  # Get more results for better composition
-            include_metadata=True
-        )
-        
-        # Convert pinecone results to format expected by build composer
-        formatted_results = []
-        for match in search_results.matches:
-            if match.metadata:
-                formatted_results.append({
-                    "name": match.metadata.get("name", "Unknown"),
-                    "category": match.metadata.get("category", "unknown"),
-                    "type": match.metadata.get("type", "unknown"),
-                    "properties": match.metadata.get("properties", {}),
-                    "score": match.score,
-                    "tags": match.metadata.get("tags", []),
-                    "description": match.metadata.get("description", "")
-                })
-        
-        # Generate dynamic build using the composer
-        build_data = build_composer.compose_build_from_search_results(intent, formatted_results)
-        
-        return BuildResponse(**build_data)
+        with metrics.stage("build", "total"):
+            # Serve repeated build requests straight from the response cache
+            cache_key = build_cache_key(request)
+            cached = response_cache.get_response("build", vector_store.version, cache_key)
+            if cached is not None:
+                return json_response(dumps(cached))
+            
+            # Analyze user intent
+            with metrics.stage("build", "intent"):
+                intent = build_composer.analyze_user_intent(request.prompt)
+            
+            # Find relevant items for the build
+            formatted_results = await search_build_items(request, intent, "build")
+            
+            # Generate dynamic build using the composer
+            with metrics.stage("build", "compose"):
+                build_data = build_composer.compose_build_from_search_results(intent, formatted_results)
+            
+            response = ordered(build_data, BUILD_RESPONSE_FIELDS)
+            response_cache.put_response("build", vector_store.version, cache_key, response)
+            return json_response(dumps(response))
         
     except Exception as e:
+        metrics.count_error("build")
         raise HTTPException(status_code=500, detail=f"Build generation error: {str(e)}")
 
+@app.post("/build/stream")
+async def stream_build(request: BuildRequest):
+    """Stream build sections over Server-Sent Events as soon as each one is ready"""
+    return StreamingResponse(
+        build_event_stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def build_event_stream(request: BuildRequest):
+    """Yield SSE events: one per build section (race, skills, equipment, spells,
+    synergies, overview, tips), then a final "done" event with the full build"""
+    try:
+        with metrics.stage("build_stream", "total"):
+            cache_key = build_cache_key(request)
+            version = vector_store.version
+            cached = response_cache.get_response("build", version, cache_key)
+            if cached is not None:
+                for section, fields in build_composer.BUILD_SECTIONS:
+                    yield sse_event(section, {field: cached[field] for field in fields})
+                yield sse_event("done", cached)
+                return
+            
+            # The race only depends on intent, so it goes out before the search runs
+            with metrics.stage("build_stream", "intent"):
+                intent = build_composer.analyze_user_intent(request.prompt)
+                recommended_race = build_composer.recommend_race(intent)
+            yield sse_event("race", {
+                "race": recommended_race["name"],
+                "race_description": recommended_race["data"]["description"]
+            })
+            
+            formatted_results = await search_build_items(request, intent, "build_stream")
+            
+            build_data = {}
+            for section, fields in build_composer.iter_build_sections(intent, formatted_results, recommended_race):
+                build_data.update(fields)
+                if section != "race":
+                    yield sse_event(section, fields)
+            
+            response = ordered(build_data, BUILD_RESPONSE_FIELDS)
+            response_cache.put_response("build", version, cache_key, response)
+            yield sse_event("done", response)
+        
+    except Exception as e:
+        metrics.count_error("build_stream")
+        yield sse_event("error", {"detail": f"Build generation error: {str(e)}"})
+
+def json_response(body: bytes) -> Response:
+    """Send an already serialized JSON body as-is"""
+    return Response(content=body, media_type="application/json")
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def search_build_items(request: BuildRequest, intent: Dict[str, Any], endpoint: str) -> List[Dict[str, Any]]:
+    """Search the vector store for items relevant to a build request"""
+    # Create a comprehensive build query
+    build_query = canonicalize_query(f"{request.prompt} {request.playstyle or ''} {request.difficulty} {' '.join(sorted(intent['themes']))}")
+    
+    # Generate embedding for the build query
+    with metrics.stage(endpoint, "encode"):
+        query_embedding = await embed_query(build_query)
+    
+    # Search the vector store for relevant items
+    with metrics.stage(endpoint, "index_query"):
+        matches = await run_in_pool(index_pool, vector_store.query, query_embedding, top_k=30)  # Get more results for better composition
+    
+    # Convert matches to format expected by build composer
+    formatted_results = []
+    for match in matches:
+        if match.metadata:
+            formatted_results.append({
+                "name": match.metadata.get("name", "Unknown"),
+                "category": match.metadata.get("category", "unknown"),
+                "type": match.metadata.get("type", "unknown"),
+                "properties": match.metadata.get("properties", {}),
+                "score": match.score,
+                "tags": match.metadata.get("tags", []),
+                "description": match.metadata.get("description", "")
+            })
+    return formatted_results
+
+async def run_in_pool(pool, func, *args, **kwargs):
+    """Run a blocking call on a worker pool without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+
+async def embed_query(text: str):
+    """Encode a canonical query string, reusing cached embeddings for repeated queries"""
+    embedding = embedding_cache.get(text)
+    if embedding is None:
+        # Concurrent misses are encoded together by the micro-batcher
+        embedding = embedding_cache.put_embedding(text, await embedding_batcher.encode(text))
+    return embedding
+
+def embed_queries(texts: List[str]):
+    """Encode canonical query strings as one batch, skipping any already cached"""
+    return embedding_cache.get_or_encode_many(texts, embed_model.encode)
+
+def normalize_category(category: Optional[str]) -> Optional[str]:
+    """Catalog category for a requested one, or None for any category
+
+    Clients send singular names ("weapon", "spell") and "items"; singular
+    names map to the plural catalog category and "items" means no filter.
+    """
+    if not category:
+        return None
+    value = "_".join(category.lower().split())
+    if not value or value in ANY_CATEGORY:
+        return None
+    if value not in CATALOG_CATEGORIES and value + "s" in CATALOG_CATEGORIES:
+        return value + "s"
+    return value
+
+def search_filter(request: SearchRequest) -> Optional[MetadataFilter]:
+    """Metadata filter pushed down into the vector store for a search request"""
+    metadata_filter = {}
+    category = normalize_category(request.category)
+    if category in CATALOG_TYPES and category not in CATALOG_CATEGORIES and not request.type:
+        # An item type such as "bow" sent as the category filters on type
+        metadata_filter["type"] = [category]
+    elif category:
+        metadata_filter["category"] = [category]
+    for field in ("type", "rarity", "school"):
+        value = getattr(request, field)
+        if value:
+            metadata_filter[field] = [value.strip().lower()]
+    return metadata_filter or None
+
+def search_depth(request: SearchRequest) -> int:
+    """Vector results to fetch; hybrid search fuses a deeper list than it returns"""
+    limit = request.limit or 5
+    return max(limit, HYBRID_CANDIDATES) if HYBRID_SEARCH else limit
+
+def exact_name_search(request: SearchRequest):
+    """Keyword-only results when the query is exactly an item name and keyword hits fill the limit, else None"""
+    if not HYBRID_SEARCH:
+        return None
+    metadata_filter = search_filter(request)
+    exact = lexical_index.exact_name_matches(request.query, metadata_filter)
+    if not exact:
+        return None
+    keyword_matches = lexical_index.search(request.query, top_k=HYBRID_CANDIDATES, filter=metadata_filter)
+    fused = reciprocal_rank_fusion([exact, keyword_matches], top_k=request.limit or 5)
+    # Too few keyword hits: search the vector index too, so the response still fills the limit
+    return fused if len(fused) >= (request.limit or 5) else None
+
+def fuse_with_lexical(request: SearchRequest, vector_matches):
+    """Reciprocal-rank fusion of vector matches with BM25 matches for the raw query
+
+    Items whose name is the whole query stay first, with score 1.0.
+    """
+    if not HYBRID_SEARCH:
+        return vector_matches
+    limit = request.limit or 5
+    metadata_filter = search_filter(request)
+    exact = lexical_index.exact_name_matches(request.query, metadata_filter)
+    keyword_matches = lexical_index.search(request.query, top_k=HYBRID_CANDIDATES, filter=metadata_filter)
+    fused = reciprocal_rank_fusion([vector_matches, keyword_matches], top_k=limit + len(exact))
+    if not exact:
+        return fused
+    exact_ids = {match.id for match in exact}
+    return (exact + [match for match in fused if match.id not in exact_ids])[:limit]
+
+def collect_service_metrics() -> List[str]:
+    """Scrape-time metrics read from the caches, the embedding batcher and the event loop monitor"""
+    lines = []
+    caches = {"embedding": embedding_cache.stats(), "response": response_cache.stats()}
+    for field in ("hits", "misses", "evictions", "expirations"):
+        lines.extend(gauge_lines(
+            f"buildcraft_cache_{field}_total", f"Cache {field} by cache",
+            {(("cache", name),): stats[field] for name, stats in caches.items()}, metric_type="counter"
+        ))
+    lines.extend(gauge_lines(
+        "buildcraft_cache_bytes", "Bytes held by each cache",
+        {(("cache", name),): stats["bytes"] for name, stats in caches.items()}
+    ))
+    
+    if embedding_batcher is not None:
+        bounds, counts, total, count = embedding_batcher.histogram()
+        lines.append("# HELP buildcraft_embedding_batch_size Texts encoded per micro-batch")
+        lines.append("# TYPE buildcraft_embedding_batch_size histogram")
+        lines.extend(histogram_lines("buildcraft_embedding_batch_size", (), bounds, counts + [0], total, count))
+        lines.extend(gauge_lines(
+            "buildcraft_embedding_queue_depth", "Encode requests waiting for a batch",
+            {(): embedding_batcher.stats()["queue_depth"]}
+        ))
+    
+    lines.extend(gauge_lines(
+        "buildcraft_event_loop_lag_max_seconds", "Largest event loop lag seen since startup",
+        {(): loop_monitor.max_lag}
+    ))
+    return lines
+
+metrics.add_collector(collect_service_metrics)
+
+def search_cache_key(request: SearchRequest) -> Dict[str, Any]:
+    """Response cache key for a search request"""
+    return {
+        "query": canonicalize_query(request.query, request.category),
+        "filter": search_filter(request),
+        "limit": request.limit or 5
+    }
+
+def build_cache_key(request: BuildRequest) -> Dict[str, Any]:
+    """Response cache key for a build request"""
+    return {
+        "prompt": canonicalize_query(request.prompt),
+        "playstyle": canonicalize_query(request.playstyle or ""),
+        "difficulty": canonicalize_query(request.difficulty or "")
+    }
+
+def build_search_response(request: SearchRequest, matches) -> bytes:
+    """Turn vector store matches into a serialized search response for the request"""
+    # Process results from the pre-serialized item payloads
+    results = []
+    summaries = []
+    for match in matches:
+        if match.metadata:
+            results.append(item_payloads.result(match.id, match.metadata, match.score))
+            summaries.append({
+                "category": match.metadata.get("category", "unknown"),
+                "tags": match.metadata.get("tags", [])
+            })
+    
+    # Generate reasoning and suggestions
+    if results:
+        categories = set(summary["category"] for summary in summaries)
+        reasoning = f"Found {len(results)} relevant items across {len(categories)} categories: {', '.join(categories)}"
+    else:
+        reasoning = f"No items found matching '{request.query}'. Try different keywords or broader terms."
+    
+    suggestions = generate_suggestions(request.query, summaries)
+    
+    return search_response_body(results, reasoning, suggestions)
+
 async def populate_vector_database():
-    """Populate Pinecone with rich game data"""
-    print("Populating vector database with game data...")
+    """Sync the vector store with rich game data, writing only added or changed items"""
+    print("Syncing vector database with game data...")
     
     # Use OBLIVION_GAMEDATA directly
     data_source = OBLIVION_GAMEDATA if game_data is None else game_data
+    documents = build_catalog_documents(data_source)
+    
+    if LOCAL_SNAPSHOT_DIR and VECTOR_BACKEND == "local":
+        # One worker at a time: the first syncs and publishes, the rest attach to its snapshot
+        with snapshot_lock(LOCAL_SNAPSHOT_DIR):
+            attached = vector_store.attach_snapshot(LOCAL_SNAPSHOT_DIR)
+            version = vector_store.version
+            sync_stats = sync_catalog(documents)
+            if not attached or vector_store.version != version:
+                vector_store.publish_snapshot(LOCAL_SNAPSHOT_DIR)
+                print(f"✅ Published shared index snapshot to {LOCAL_SNAPSHOT_DIR}")
+            else:
+                print(f"✅ Attached to shared index snapshot in {LOCAL_SNAPSHOT_DIR}")
+    else:
+        sync_stats = sync_catalog(documents)
+    
+    print(f"✅ Synced vector database with {len(documents)} items: "
+          f"{sync_stats['added']} added, {sync_stats['updated']} updated, "
+          f"{sync_stats['deleted']} deleted, {sync_stats['unchanged']} unchanged")
+    
+    # Build (or load) the ANN index now rather than on the first query
+    vector_store.build_index()
+
+def sync_catalog(documents: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Write added or changed documents to the vector store, re-encoding only documents whose text changed"""
+    disk_cache = DiskEmbeddingCache(embed_model.cache_name)
+    return sync_documents(
+        vector_store, documents, GAMEDATA_ID_PREFIX,
+        embed=lambda texts: disk_cache.encode(texts, embed_model.encode)
+    )
+
+def build_catalog_documents(data_source: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Documents (stable ID, embedding text, metadata) for every catalog item"""
+    catalog_items = [(category, item) for category, items in data_source.items() for item in items]
+    ids = assign_stable_ids(GAMEDATA_ID_PREFIX, catalog_items)
     
     # Prepare documents for embedding
     documents = []
     
-    for category, items in data_source.items():
-        for item in items:
-            # Create rich text representation for embedding
-            text_parts = [
-                item["name"],
-                item.get("description", ""),
-                " ".join(item.get("tags", [])),
-                item.get("category", ""),
-                item.get("type", "")
-            ]
-            
-            # Add category-specific information
-            if category == "skills":
-                text_parts.extend([
-                    item.get("governing_attribute", ""),
-                    item.get("combat_role", ""),
-                    " ".join(item.get("synergies", []))
-                ])
-            elif category == "weapons":
-                text_parts.extend([
-                    item.get("skill_required", ""),
-                    item.get("damage_type", ""),
-                    item.get("rarity", "")
-                ])
-            elif category == "spells":
-                text_parts.extend([
-                    item.get("school", ""),
-                    item.get("effect", "")
-                ])
-            
-            # Create document text
-            doc_text = " ".join(filter(None, text_parts))
-            
-            documents.append({
-                "id": f"{category}_{len(documents)}",
-                "text": doc_text,
-                "metadata": {
-                    "name": item["name"],
-                    "category": category,
-                    "type": item.get("type", category),
-                    "description": item.get("description", ""),
-                    "tags": ",".join(item.get("tags", [])) if item.get("tags") else "",
-                }
-            })
-    
-    # Generate embeddings and upsert to Pinecone
-    batch_size = 100
-    for i in range(0, len(documents), batch_size):
-        batch = documents[i:i + batch_size]
+    for vector_id, (category, item) in zip(ids, catalog_items):
+        # Create rich text representation for embedding
+        text_parts = [
+            item["name"],
+            item.get("description", ""),
+            " ".join(item.get("tags", [])),
+            item.get("category", ""),
+            item.get("type", "")
+        ]
         
-        # Generate embeddings
-        texts = [doc["text"] for doc in batch]
-        embeddings = embed_model.encode(texts).tolist()
+        # Add category-specific information
+        if category == "skills":
+            text_parts.extend([
+                item.get("governing_attribute", ""),
+                item.get("combat_role", ""),
+                " ".join(item.get("synergies", []))
+            ])
+        elif category == "weapons":
+            text_parts.extend([
+                item.get("skill_required", ""),
+                item.get("damage_type", ""),
+                item.get("rarity", "")
+            ])
+        elif category == "spells":
+            text_parts.extend([
+                item.get("school", ""),
+                item.get("effect", "")
+            ])
         
-        # Prepare upsert data
-        upsert_data = []
-        for j, doc in enumerate(batch):
-            upsert_data.append({
-                "id": doc["id"],
-                "values": embeddings[j],
-                "metadata": doc["metadata"]
-            })
+        # Create document text
+        doc_text = " ".join(filter(None, text_parts))
         
-        # Upsert to Pinecone
-        pinecone_index.upsert(vectors=upsert_data)
+        documents.append({
+            "id": vector_id,
+            "text": doc_text,
+            "metadata": {
+                "name": item["name"],
+                "category": category,
+                "type": item.get("type", category).lower(),
+                "rarity": item.get("rarity", "").lower(),
+                "school": item.get("school", "").lower(),
+                "description": item.get("description", ""),
+                "tags": ",".join(item.get("tags", [])) if item.get("tags") else "",
+            }
+        })
     
-    print(f"✅ Populated vector database with {len(documents)} items")
+    return documents
 
 def generate_suggestions(query: str, results: List[Dict[str, Any]]) -> List[str]:
     """Generate follow-up suggestions based on search results"""
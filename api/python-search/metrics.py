@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Service Metrics for BuildCraft AI
+Lightweight histograms and counters rendered in the Prometheus text format
+"""
+
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency bucket upper bounds in seconds (0.1 ms to 10 s)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Batch size bucket upper bounds
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# Quantiles estimated from histogram buckets at scrape time
+REPORTED_QUANTILES = (0.5, 0.95, 0.99)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observing is a bisect and two increments"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if total == 0:
+            return 0.0
+
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count > 0:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower  # open-ended bucket: report its lower bound
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+class Counter:
+    """Monotonic counter"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _StageTimer:
+    """Context manager that records elapsed wall time into a histogram"""
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class MetricsRegistry:
+    """Holds every metric family and renders them on demand
+
+    Recording only touches preallocated histograms and counters. All
+    formatting, quantile estimation and collector calls happen at scrape time.
+    """
+
+    def __init__(self, namespace: str = "buildcraft"):
+        self.namespace = namespace
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, Counter]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                  **labels: str) -> Histogram:
+        """Get or create a labelled histogram"""
+        name = f"{self.namespace}_{name}"
+        key = tuple(sorted(labels.items()))
+        family = self._histograms.get(name)
+        if family is None or key not in family:
+            with self._lock:
+                family = self._histograms.setdefault(name, {})
+                self._help.setdefault(name, help_text)
+                if key not in family:
+                    family[key] = Histogram(buckets)
+        return family[key]
+
+    def counter(self, name: str, help_text: str, **labels: str) -> Counter:
+        """Get or create a labelled counter"""
+        name = f"{self.namespace}_{name}"
+        key = tuple(sorted(labels.items()))
+        family = self._counters.get(name)
+        if family is None or key not in family:
+            with self._lock:
+                family = self._counters.setdefault(name, {})
+                self._help.setdefault(name, help_text)
+                if key not in family:
+                    family[key] = Counter()
+        return family[key]
+
+    def stage(self, endpoint: str, stage: str) -> _StageTimer:
+        """Time one stage of an endpoint: `with metrics.stage("search", "encode"): ...`"""
+        return _StageTimer(self.histogram(
+            "stage_duration_seconds", "Wall time spent in each stage of each endpoint",
+            endpoint=endpoint, stage=stage
+        ))
+
+    def batch_size(self, endpoint: str) -> Histogram:
+        """Histogram of items handled per batched request"""
+        return self.histogram("request_batch_size", "Queries handled per batched request",
+                              buckets=BATCH_SIZE_BUCKETS, endpoint=endpoint)
+
+    def count_error(self, endpoint: str) -> None:
+        self.counter("errors_total", "Requests that failed with an error", endpoint=endpoint).inc()
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Register a callable returning extra exposition lines at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines: List[str] = []
+
+        for name, family in sorted(self._histograms.items()):
+            lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(family.items()):
+                lines.extend(histogram_lines(name, labels, histogram.buckets, histogram.counts,
+                                             histogram.sum, histogram.count))
+
+            # Pre-computed quantiles for dashboards that don't aggregate buckets
+            lines.append(f"# HELP {name}_quantile Estimated quantiles of {name}")
+            lines.append(f"# TYPE {name}_quantile gauge")
+            for labels, histogram in sorted(family.items()):
+                for q in REPORTED_QUANTILES:
+                    lines.append(f"{name}_quantile{_format_labels(labels, ('quantile', str(q)))} "
+                                 f"{_format_value(histogram.quantile(q))}")
+
+        for name, family in sorted(self._counters.items()):
+            lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, counter in sorted(family.items()):
+                lines.append(f"{name}{_format_labels(labels)} {counter.value}")
+
+        for collector in self._collectors:
+            lines.extend(collector())
+
+        return "\n".join(lines) + "\n"
+
+
+def histogram_lines(name: str, labels: Labels, buckets: Sequence[float], counts: Sequence[int],
+                    total: float, count: int) -> List[str]:
+    """Exposition lines for one histogram from per-bucket (non-cumulative) counts"""
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip(list(buckets) + [float("inf")], counts):
+        cumulative += bucket_count
+        lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return lines
+
+
+def gauge_lines(name: str, help_text: str, values: Dict[Labels, float], metric_type: str = "gauge") -> List[str]:
+    """Exposition lines for a gauge (or counter) family"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in sorted(values.items()):
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return lines
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Response Payloads for BuildCraft AI
+Catalog items pre-serialized once into JSON fragments, assembled into
+response bodies without rebuilding or re-validating per-item dicts
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Sequence
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON encoding
+    orjson = None
+
+# Search result fields, in response order ("score" is appended per request)
+RESULT_FIELDS = ("name", "category", "type", "description", "tags", "properties")
+RESULT_DEFAULTS = {"name": "Unknown", "category": "unknown", "type": "unknown", "description": "", "tags": [],
+                   "properties": {}}
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON, identical in shape to FastAPI's JSONResponse"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def result_fragment(metadata: Dict[str, Any]) -> bytes:
+    """A search result object without its score and closing brace"""
+    result = {field: metadata.get(field, RESULT_DEFAULTS[field]) for field in RESULT_FIELDS}
+    return dumps(result)[:-1]
+
+
+def score_suffix(score: float) -> bytes:
+    # repr matches the stdlib JSON encoder for the rounded score
+    return f',"score":{round(score, 3)!r}}}'.encode("ascii")
+
+
+class ItemPayloads:
+    """Result fragments for every catalog item, keyed by vector ID"""
+
+    def __init__(self, documents: Iterable[Dict[str, Any]]):
+        self._fragments: Dict[str, bytes] = {
+            doc["id"]: result_fragment(doc["metadata"]) for doc in documents
+        }
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def result(self, vector_id: str, metadata: Dict[str, Any], score: float) -> bytes:
+        """Serialized search result; items outside the catalog are serialized on the fly"""
+        fragment = self._fragments.get(vector_id)
+        if fragment is None:
+            fragment = result_fragment(metadata)
+        return fragment + score_suffix(score)
+
+
+def search_response_body(results: Sequence[bytes], reasoning: str, suggestions: List[str]) -> bytes:
+    """SearchResponse JSON from already-serialized results"""
+    return b"".join([
+        b'{"results":[', b",".join(results), b'],"reasoning":', dumps(reasoning),
+        b',"suggestions":', dumps(suggestions), b"}"
+    ])
+
+
+def json_array(bodies: Sequence[bytes]) -> bytes:
+    return b"[" + b",".join(bodies) + b"]"
+
+
+def ordered(data: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """Project a dict onto a response model's fields, in the model's order"""
+    return {field: data[field] for field in fields}
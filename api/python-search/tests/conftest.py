@@ -0,0 +1,43 @@
+"""
+Test fixtures for the BuildCraft AI search service
+The service runs in-process on the local vector store with the benchmark
+stand-in encoder, so tests need no model download or Pinecone account
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.join(SERVICE_DIR, "benchmarks"))
+
+
+@pytest.fixture(scope="session")
+def service():
+    """The main module, configured for tests (import it through this fixture only)"""
+    # The service reads its configuration from the environment at import time
+    os.environ["VECTOR_BACKEND"] = "local"
+    os.environ["RESPONSE_CACHE_MB"] = "0"
+    os.environ["EMBEDDING_CACHE_DIR"] = tempfile.mkdtemp(prefix="buildcraft-test-")
+    for name in ("PINECONE_API_KEY", "EMBEDDING_SERVER_SOCKET", "LOCAL_SNAPSHOT_DIR", "ANN_INDEX_PATH",
+                 "LOCAL_VECTOR_DIR"):
+        os.environ[name] = ""
+
+    import main
+    from stand_ins import FakeEncoder
+
+    encoder = FakeEncoder(dimension=main.EMBEDDING_DIMENSION)
+    main.create_encoder = lambda *_args, **_kwargs: encoder
+    return main
+
+
+@pytest.fixture(scope="session")
+def client(service):
+    """HTTP client for the service with its lifespan (catalog load) running"""
+    from fastapi.testclient import TestClient
+
+    with TestClient(service.app) as test_client:
+        yield test_client
@@ -0,0 +1,75 @@
+"""Build composer scoring paths agree with each other"""
+
+import json
+import random
+
+import pytest
+
+import candidate_scoring
+from build_composer import OblivionBuildComposer
+from candidate_scoring import select_top
+
+NAMES = ["Elven Bow", "Shadow Blade", "Iron Sword", "Heavy Armor", "Light Armor", "Mage Robe", "Fire Staff",
+         "Glass Bow", "Sneak", "Blade", "Marksman", "Destruction", "shadowfire"]
+THEMES = ["stealth", "archer", "bow", "magic", "sword", "armor", "heavy", "light", "fire", "shadow", "blade", ""]
+CATEGORIES = ["skills", "weapons", "armor", "spells", "potions"]
+
+
+def compose_cases(seed=11, count=300):
+    rng = random.Random(seed)
+    composer = OblivionBuildComposer()
+    for trial in range(count):
+        intent = composer.analyze_user_intent(" ".join(rng.choice(THEMES) for _ in range(rng.randint(0, 6))))
+        intent["themes"] = [rng.choice(THEMES) for _ in range(rng.randint(0, 12))]
+        results = [
+            {
+                "name": f"{rng.choice(NAMES)} {i % 7}",
+                "category": rng.choice(CATEGORIES),
+                "score": rng.choice([0.5, 0.25, round(rng.random(), 2)]),
+                "school": rng.choice(["Destruction", "illusion", ""]),
+            }
+            for i in range(rng.randint(0, 80))
+        ]
+        yield trial, intent, results
+
+
+def compose_all(composer):
+    outputs = []
+    for trial, intent, results in compose_cases():
+        random.seed(trial)
+        outputs.append(json.dumps(composer.compose_build_from_search_results(intent, results)))
+    return outputs
+
+
+def test_vectorized_path_matches_python_scoring(monkeypatch):
+    monkeypatch.setattr(candidate_scoring, "VECTORIZE_MIN_CANDIDATES", 10 ** 9)
+    python = compose_all(OblivionBuildComposer())
+    monkeypatch.setattr(candidate_scoring, "VECTORIZE_MIN_CANDIDATES", 0)
+    vectorized = compose_all(OblivionBuildComposer())
+    assert vectorized == python
+
+
+@pytest.mark.parametrize("count", [0, 5, 63, 64, 300])
+def test_select_top_matches_repeated_addition(count):
+    rng = random.Random(count)
+    base_scores = [rng.choice([0.5, 1, round(rng.random(), 2), rng.random()]) for _ in range(count)]
+    boosts = [([rng.choice([0, 0, 1, 2, 5]) for _ in range(count)], amount) for amount in (0.4, 0.3)]
+
+    scores = list(base_scores)
+    for counts, amount in boosts:
+        for i, boost in enumerate(counts):
+            for _ in range(boost):
+                scores[i] += amount
+    expected = sorted(enumerate(scores), key=lambda item: item[1], reverse=True)[:7]
+
+    selected = select_top(base_scores, boosts, 7)
+    assert selected == expected
+    assert [type(score) for _, score in selected] == [type(score) for _, score in expected]
+
+
+@pytest.mark.parametrize("prompt, archetype", [
+    ("I want a stealth archer with a bow", "stealth_archer"),
+    ("", "versatile"),
+])
+def test_analyze_user_intent_primary_archetype(prompt, archetype):
+    assert OblivionBuildComposer().analyze_user_intent(prompt)["primary_archetype"] == archetype
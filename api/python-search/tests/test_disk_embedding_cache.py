@@ -0,0 +1,62 @@
+"""DiskEmbeddingCache round-trips and reloads"""
+
+import numpy as np
+
+from disk_embedding_cache import DiskEmbeddingCache
+from stand_ins import FakeEncoder
+
+
+class CountingEncoder(FakeEncoder):
+    def __init__(self):
+        super().__init__(dimension=8)
+        self.encoded = []
+
+    def __call__(self, texts):
+        self.encoded.extend(texts)
+        return self.encode(texts)
+
+
+def text_with_nul_digest(cache):
+    """A document whose content address ends in a NUL byte"""
+    for i in range(100000):
+        text = f"document {i}"
+        if cache.key(text).endswith(b"\0"):
+            return text
+    raise AssertionError("no digest ending in NUL found")
+
+
+def test_digest_ending_in_nul_round_trips(tmp_path):
+    cache = DiskEmbeddingCache("fake-model", cache_dir=str(tmp_path))
+    texts = [text_with_nul_digest(cache), "plain document", "another document"]
+    encoder = CountingEncoder()
+    first = cache.encode(texts, encoder)
+    assert sorted(encoder.encoded) == sorted(texts)
+
+    # A reload finds every row, including the NUL-terminated digest, and appends nothing
+    reloaded = DiskEmbeddingCache("fake-model", cache_dir=str(tmp_path))
+    assert len(reloaded) == len(texts)
+    encoder.encoded.clear()
+    again = reloaded.encode(texts, encoder)
+    assert encoder.encoded == []
+    assert reloaded.misses == 0
+    assert len(DiskEmbeddingCache("fake-model", cache_dir=str(tmp_path))) == len(texts)
+    np.testing.assert_array_equal(first, again)
+
+
+def test_only_new_texts_are_encoded(tmp_path):
+    encoder = CountingEncoder()
+    DiskEmbeddingCache("fake-model", cache_dir=str(tmp_path)).encode(["a", "b"], encoder)
+    encoder.encoded.clear()
+    cache = DiskEmbeddingCache("fake-model", cache_dir=str(tmp_path))
+    vectors = cache.encode(["b", "c", "c", "a"], encoder)
+    assert encoder.encoded == ["c"]
+    assert len(cache) == 3
+    np.testing.assert_array_equal(vectors[1], vectors[2])
+    np.testing.assert_allclose(vectors, encoder.encode(["b", "c", "c", "a"]), rtol=1e-6)
+
+
+def test_models_do_not_share_entries(tmp_path):
+    encoder = CountingEncoder()
+    DiskEmbeddingCache("model-a", cache_dir=str(tmp_path)).encode(["a"], encoder)
+    DiskEmbeddingCache("model-b", cache_dir=str(tmp_path)).encode(["a"], encoder)
+    assert encoder.encoded == ["a", "a"]
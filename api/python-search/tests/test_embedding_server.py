@@ -0,0 +1,122 @@
+"""Embedding server wire protocol, round trips and in-process fallback"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from embedding_server import (OP_ENCODE, EmbeddingServer, RemoteEncoder, decode_matrix, encode_matrix,
+                              encode_request)
+from stand_ins import FakeEncoder
+
+DIMENSION = 24
+
+
+def test_matrix_round_trip():
+    matrix = np.random.default_rng(0).standard_normal((5, DIMENSION)).astype(np.float32)
+    np.testing.assert_array_equal(decode_matrix(encode_matrix(matrix)), matrix)
+    assert decode_matrix(encode_matrix(np.empty((0, 0), dtype=np.float32))).shape == (0, 0)
+
+
+def test_encode_request_layout():
+    request = encode_request(OP_ENCODE, ["ab", "é"])
+    assert request == bytes([OP_ENCODE]) + (2).to_bytes(4, "little") + \
+        (2).to_bytes(4, "little") + b"ab" + (2).to_bytes(4, "little") + "é".encode("utf-8")
+
+
+class RunningServer:
+    """An EmbeddingServer serving on a background thread's event loop"""
+
+    def __init__(self, socket_path, encoder):
+        self.socket_path = socket_path
+        self.server = EmbeddingServer(encoder, socket_path, max_batch_size=4, max_wait_ms=1)
+        self.loop = asyncio.new_event_loop()
+        self.task = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        deadline = time.monotonic() + 5
+        while not os.path.exists(socket_path):
+            assert time.monotonic() < deadline, "embedding server did not start"
+            time.sleep(0.01)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.task = self.loop.create_task(self.server.serve_forever())
+        try:
+            self.loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            pass
+        # Close connections still being served, as a server process exiting would
+        pending = asyncio.all_tasks(self.loop)
+        for task in pending:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self.loop.close()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.task.cancel)
+        self.thread.join(timeout=5)
+
+
+@pytest.fixture
+def socket_path():
+    # Unix socket paths are limited to ~100 bytes, so keep it short
+    directory = tempfile.mkdtemp(prefix="emb-")
+    yield os.path.join(directory, "s.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def no_fallback():
+    raise AssertionError("fell back to in-process encoding while the server was up")
+
+
+def test_remote_encoder_round_trips_through_server(socket_path):
+    encoder = FakeEncoder(dimension=DIMENSION)
+    server = RunningServer(socket_path, encoder)
+    remote = None
+    try:
+        remote = RemoteEncoder(socket_path, no_fallback)
+        assert remote.cache_name == encoder.cache_name
+
+        texts = [f"stealth archer {i}" for i in range(10)]
+        np.testing.assert_array_equal(remote.encode(texts), encoder.encode(texts))  # above max_batch_size
+        np.testing.assert_array_equal(remote.encode(texts[:3]), encoder.encode(texts[:3]))  # batched
+        np.testing.assert_array_equal(remote.encode("fire mage"), encoder.encode("fire mage"))
+        assert remote.fallback_encodes == 0
+        assert remote.info()["fallback_loaded"] is False
+        assert server.server.texts == 14
+    finally:
+        if remote is not None:
+            remote.client._close()
+        server.stop()
+
+
+def test_missing_socket_falls_back_in_process(socket_path):
+    fallback = FakeEncoder(dimension=DIMENSION)
+    remote = RemoteEncoder(socket_path, lambda: fallback, retry_seconds=60)
+    assert remote.server_info is None
+    assert remote.cache_name == fallback.cache_name
+
+    vectors = remote.encode(["heavy armor", "healing"])
+    np.testing.assert_array_equal(vectors, fallback.encode(["heavy armor", "healing"]))
+    assert remote.fallback_encodes == 2
+    assert remote.info()["fallback_loaded"] is True
+
+
+def test_server_going_away_falls_back(socket_path):
+    encoder = FakeEncoder(dimension=DIMENSION)
+    server = RunningServer(socket_path, encoder)
+    fallback_loads = []
+    remote = RemoteEncoder(socket_path, lambda: fallback_loads.append(1) or FakeEncoder(dimension=DIMENSION))
+    remote.encode(["before"])
+    server.stop()
+
+    np.testing.assert_array_equal(remote.encode(["after"]), encoder.encode(["after"]))
+    assert remote.fallback_encodes == 1
+    assert fallback_loads == [1]
+    remote.client._close()
@@ -0,0 +1,35 @@
+"""Queries that are exactly an item name rank that item first and still fill the limit"""
+
+import pytest
+
+
+@pytest.mark.parametrize("body", [
+    {"query": "Sneak", "category": "skills", "limit": 10},
+    {"query": "Sneak", "limit": 10},
+    {"query": "Fireball", "limit": 10},
+    {"query": "mehrunes razor"},
+    {"query": "Mehrunes' Razor", "limit": 3},
+])
+def test_exact_name_query_fills_limit(client, body):
+    response = client.post("/search", json=body)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == body.get("limit", 5)
+    assert len({result["name"] for result in results}) == len(results)
+
+
+@pytest.mark.parametrize("query, name", [
+    ("Sneak", "Sneak"),
+    ("fireball", "Fireball"),
+    ("mehrunes razor", "Mehrunes' Razor"),
+])
+def test_exact_name_ranks_first(client, query, name):
+    results = client.post("/search", json={"query": query, "limit": 10}).json()["results"]
+    assert results[0]["name"] == name
+    assert results[0]["score"] == 1.0
+
+
+def test_exact_name_in_batch(client):
+    responses = client.post("/search/batch", json=[{"query": "Sneak", "limit": 10}, {"query": "Fireball", "limit": 4}])
+    assert [len(response["results"]) for response in responses.json()] == [10, 4]
+    assert [response["results"][0]["name"] for response in responses.json()] == ["Sneak", "Fireball"]
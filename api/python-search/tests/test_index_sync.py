@@ -0,0 +1,153 @@
+"""Stable vector IDs and diff-based index sync"""
+
+import numpy as np
+import pytest
+
+from index_sync import assign_stable_ids, legacy_ids, sync_documents
+from stand_ins import FakeEncoder, FakePineconeIndex
+from vector_store import LocalVectorStore, PineconeVectorStore
+
+DIMENSION = 32
+
+
+@pytest.fixture(params=["local", "pinecone"])
+def store(request):
+    if request.param == "local":
+        return LocalVectorStore(dimension=DIMENSION)
+    return PineconeVectorStore(FakePineconeIndex(dimension=DIMENSION, page_size=3))
+
+
+class CountingEncoder(FakeEncoder):
+    def __init__(self):
+        super().__init__(dimension=DIMENSION)
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return self.encode(texts)
+
+
+def documents(prefix, items):
+    ids = assign_stable_ids(prefix, items)
+    return [
+        {"id": vector_id, "text": f"{item['name']} {item.get('description', '')}",
+         "metadata": {"name": item["name"], "category": category}}
+        for vector_id, (category, item) in zip(ids, items)
+    ]
+
+
+CATALOG = [
+    ("weapons", {"name": "Daedric Longsword"}),
+    ("weapons", {"name": "Elven Bow"}),
+    ("spells", {"name": "Fireball", "description": "fire damage"}),
+    ("skills", {"name": "Sneak"}),
+]
+
+
+def test_stable_ids_ignore_order():
+    ids = assign_stable_ids("gamedata", CATALOG)
+    assert ids[0] == "gamedata:weapons:daedric-longsword"
+    reordered = assign_stable_ids("gamedata", CATALOG[::-1])
+    assert dict(zip(reordered, CATALOG[::-1])) == dict(zip(ids, CATALOG))
+
+
+def test_stable_ids_disambiguate_shared_names():
+    items = [("potions", {"name": "Cure Disease", "value": 1}),
+             ("potions", {"name": "Cure Disease", "value": 2}),
+             ("potions", {"name": "Cure Disease", "value": 2})]
+    ids = assign_stable_ids("gamedata", items)
+    assert len(set(ids)) == 3
+    assert all(vector_id.startswith("gamedata:potions:cure-disease-") for vector_id in ids)
+    assert ids[2] == ids[1] + "-2"
+    assert assign_stable_ids("gamedata", items[::-1])[::-1][0] == ids[0]
+
+
+def test_sync_adds_updates_and_deletes(store):
+    encoder = CountingEncoder()
+    docs = documents("gamedata", CATALOG)
+    assert sync_documents(store, docs, "gamedata", encoder) == {"added": 4, "updated": 0, "deleted": 0, "unchanged": 0}
+
+    # Re-running against the same catalog writes nothing and encodes nothing
+    encoder.batches.clear()
+    assert sync_documents(store, docs, "gamedata", encoder) == {"added": 0, "updated": 0, "deleted": 0, "unchanged": 4}
+    assert encoder.batches == []
+
+    # One item changed, one removed, one added
+    changed = [CATALOG[0], ("weapons", {"name": "Elven Bow", "description": "light bow"}), CATALOG[2],
+               ("armor", {"name": "Glass Armor"})]
+    changed_docs = documents("gamedata", changed)
+    stats = sync_documents(store, changed_docs, "gamedata", encoder)
+    assert stats == {"added": 1, "updated": 1, "deleted": 1, "unchanged": 2}
+    assert sorted(text for batch in encoder.batches for text in batch) == sorted(
+        doc["text"] for doc in changed_docs if doc["id"] in ("gamedata:weapons:elven-bow", "gamedata:armor:glass-armor")
+    )
+
+    assert sorted(store.list_ids("gamedata:")) == sorted(doc["id"] for doc in changed_docs)
+    match = store.query(encoder.encode(changed_docs[1]["text"]), top_k=1)[0]
+    assert match.id == "gamedata:weapons:elven-bow"
+    assert match.metadata["content_hash"] == store.fetch_content_hashes([match.id])[match.id]
+
+
+def test_sync_leaves_other_prefixes_alone(store):
+    encoder = CountingEncoder()
+    sync_documents(store, documents("processed", CATALOG), "processed", encoder)
+    sync_documents(store, documents("gamedata", CATALOG[:2]), "gamedata", encoder)
+
+    stats = sync_documents(store, [], "gamedata", encoder)
+    assert stats["deleted"] == 2
+    assert store.list_ids("gamedata:") == []
+    assert len(store.list_ids("processed:")) == len(CATALOG)
+
+
+def test_legacy_ids_are_outside_managed_prefixes(store):
+    encoder = CountingEncoder()
+    sync_documents(store, documents("gamedata", CATALOG), "gamedata", encoder)
+    sync_documents(store, documents("processed", CATALOG[:1]), "processed", encoder)
+    legacy = ["weapons_0_daedric_longsword", "spells_12_fireball", "gamedata_without_colon"]
+    store.upsert(legacy, encoder.encode(legacy), [{"name": name} for name in legacy])
+
+    stale = legacy_ids(store, ["processed", "gamedata"])
+    assert sorted(stale) == sorted(legacy)
+
+    # Purging them (as --purge-legacy does) leaves every managed vector in place
+    store.delete(stale)
+    assert legacy_ids(store, ["processed", "gamedata"]) == []
+    assert len(store.list_ids("gamedata:")) == len(CATALOG)
+    assert len(store.list_ids("processed:")) == 1
+    assert np.isclose(store.query(encoder.encode("Sneak"), top_k=1)[0].score, 1.0, atol=1e-5)
+
+
+class RecordingStore(LocalVectorStore):
+    def __init__(self, write_batch_size=None):
+        super().__init__(dimension=DIMENSION)
+        self.write_batch_size = write_batch_size
+        self.upserts = []
+        self.deletes = []
+
+    def upsert(self, ids, vectors, metadata):
+        self.upserts.append(len(ids))
+        super().upsert(ids, vectors, metadata)
+
+    def delete(self, ids):
+        self.deletes.append(len(ids))
+        super().delete(ids)
+
+
+def many_documents(count):
+    return documents("gamedata", [("weapons", {"name": f"Sword {i}"}) for i in range(count)])
+
+
+@pytest.mark.parametrize("write_batch_size, batch_size, upserts, deletes", [
+    (None, None, [250], [240]),
+    (100, None, [100, 100, 50], [100, 100, 40]),
+    (None, 64, [64, 64, 64, 58], [64, 64, 64, 48]),
+])
+def test_sync_write_batches(write_batch_size, batch_size, upserts, deletes):
+    # The local store takes every write at once; batches follow the store's write_batch_size or batch_size
+    store = RecordingStore(write_batch_size)
+    sync_documents(store, many_documents(250), "gamedata", CountingEncoder(), batch_size=batch_size)
+    assert store.upserts == upserts
+
+    sync_documents(store, many_documents(250)[:10], "gamedata", CountingEncoder(), batch_size=batch_size)
+    assert store.deletes == deletes
+    assert store.count() == 10
@@ -0,0 +1,45 @@
+"""KeywordMatcher agrees with a plain `keyword in text` test on both of its paths"""
+
+import random
+
+import pytest
+
+import keyword_matcher
+from keyword_matcher import KeywordMatcher
+
+VOCABULARY = ["bow", "elbow", "arch", "archer", "archery", "fire", "ice", "spellsword", "spell", "sword",
+              "heavy armor", "dark", "darkness", "a"]
+TEXTS = ["", "an elbow", "stealth archer with a bow", "Spellsword of darkness", "icefire", "heavy armor tank",
+         "heavy  armor", "sword&bow-archery"]
+
+
+@pytest.fixture(params=["plain", "trie"])
+def matcher_path(request, monkeypatch):
+    monkeypatch.setattr(keyword_matcher, "PLAIN_SCAN_MAX_KEYWORDS", 10 ** 6 if request.param == "plain" else 0)
+    return request.param
+
+
+@pytest.mark.parametrize("vocabulary", [VOCABULARY, [keyword for keyword in VOCABULARY if " " not in keyword]])
+def test_find_matches_substring_test(matcher_path, vocabulary):
+    matcher = KeywordMatcher(vocabulary)
+    for text in TEXTS:
+        expected = {keyword for keyword in vocabulary if keyword in text}
+        assert matcher.find(text) == expected
+
+
+def test_find_fuzzed_text(matcher_path):
+    rng = random.Random(7)
+    matcher = KeywordMatcher(VOCABULARY)
+    pieces = VOCABULARY + ["x", "el", "ness", " ", "-"]
+    for _ in range(500):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        assert matcher.find(text) == {keyword for keyword in VOCABULARY if keyword in text}
+
+
+@pytest.mark.parametrize("size", [1, 16, 17, 45])
+def test_find_returns_keywords_not_text(size):
+    # "heal" is a substring of the text but not a keyword, so it is not found
+    matcher = KeywordMatcher(["healing"] + [f"keyword{i}" for i in range(size - 1)])
+    found = matcher.find("healing spells")
+    assert found == {"healing"}
+    assert "heal" not in found
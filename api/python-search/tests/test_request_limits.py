@@ -0,0 +1,52 @@
+"""Validation of result limits and batch sizes on /search, /search/batch and /autocomplete"""
+
+import pytest
+
+
+@pytest.mark.parametrize("limit", [-1, 0, 101])
+def test_search_rejects_out_of_range_limit(client, limit):
+    response = client.post("/search", json={"query": "fire", "limit": limit})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("limit", [1, 5, 100])
+def test_search_returns_at_most_limit(client, limit):
+    response = client.post("/search", json={"query": "fire", "limit": limit})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert 0 < len(results) <= limit
+
+
+def test_search_default_limit(client):
+    response = client.post("/search", json={"query": "fire"})
+    assert len(response.json()["results"]) == 5
+
+
+def test_batch_search_rejects_out_of_range_limit(client):
+    response = client.post("/search/batch", json=[{"query": "fire"}, {"query": "bow", "limit": -1}])
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("limit", [-1, 0, 51])
+def test_autocomplete_rejects_out_of_range_limit(client, limit):
+    response = client.get("/autocomplete", params={"q": "a", "limit": limit})
+    assert response.status_code == 422
+
+
+def test_autocomplete_returns_at_most_limit(client):
+    response = client.get("/autocomplete", params={"q": "a", "limit": 3})
+    assert response.status_code == 200
+    assert len(response.json()["completions"]) == 3
+
+
+def test_batch_search_rejects_too_many_queries(client, service):
+    batch = [{"query": f"fire {i}"} for i in range(service.MAX_BATCH_QUERIES + 1)]
+    response = client.post("/search/batch", json=batch)
+    assert response.status_code == 422
+
+
+def test_batch_search_accepts_largest_batch(client, service):
+    batch = [{"query": f"fire {i}", "limit": 1} for i in range(service.MAX_BATCH_QUERIES)]
+    response = client.post("/search/batch", json=batch)
+    assert response.status_code == 200
+    assert len(response.json()) == service.MAX_BATCH_QUERIES
@@ -0,0 +1,73 @@
+"""Search filter semantics: category names as clients send them, and filter push-down"""
+
+import pytest
+
+
+@pytest.mark.parametrize("category, expected", [
+    ("weapons", "weapons"),
+    ("weapon", "weapons"),
+    ("Spell", "spells"),
+    ("skill", "skills"),
+    ("armor", "armor"),
+    ("Armor ", "armor"),
+    ("soul gem", "soul_gems"),
+    ("items", None),
+    ("item", None),
+    ("", None),
+    (None, None),
+])
+def test_normalize_category(service, category, expected):
+    assert service.normalize_category(category) == expected
+
+
+@pytest.mark.parametrize("fields, expected", [
+    ({}, None),
+    ({"category": "items"}, None),
+    ({"category": "weapon"}, {"category": ["weapons"]}),
+    ({"category": "bow"}, {"type": ["bow"]}),
+    ({"category": "armor"}, {"category": ["armor"]}),
+    ({"category": "Spells", "school": "Destruction"}, {"category": ["spells"], "school": ["destruction"]}),
+    ({"type": " Blade ", "rarity": "RARE"}, {"type": ["blade"], "rarity": ["rare"]}),
+])
+def test_search_filter(service, fields, expected):
+    request = service.SearchRequest(query="sword", **fields)
+    assert service.search_filter(request) == expected
+
+
+@pytest.mark.parametrize("category, expected", [
+    # The chat client sends whichever form the user typed (ChatContainer.tsx)
+    ("weapon", "weapons"),
+    ("weapons", "weapons"),
+    ("spell", "spells"),
+    ("skill", "skills"),
+    ("armor", "armor"),
+])
+def test_search_category_results(client, category, expected):
+    response = client.post("/search", json={"query": "best gear for a warrior", "category": category, "limit": 5})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results
+    assert {result["category"] for result in results} == {expected}
+
+
+def test_search_items_is_unfiltered(client):
+    response = client.post("/search", json={"query": "fire", "category": "items", "limit": 10})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 10
+    assert len({result["category"] for result in results}) > 1
+
+
+def test_search_filter_matches_unfiltered_subset(client):
+    unfiltered = client.post("/search", json={"query": "fire", "limit": 50}).json()["results"]
+    filtered = client.post("/search", json={"query": "fire", "category": "spells", "limit": 50}).json()["results"]
+    assert filtered
+    assert all(result["category"] == "spells" for result in filtered)
+    assert len(filtered) <= len(unfiltered)
+
+
+def test_autocomplete_singular_category(client):
+    plural = client.get("/autocomplete", params={"q": "f", "category": "spells"}).json()["completions"]
+    singular = client.get("/autocomplete", params={"q": "f", "category": "spell"}).json()["completions"]
+    assert plural
+    assert singular == plural
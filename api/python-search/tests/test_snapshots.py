@@ -0,0 +1,109 @@
+"""A store attached to a published snapshot behaves like one holding the data privately"""
+
+import numpy as np
+import pytest
+
+from vector_store import LocalVectorStore
+
+DIMENSION = 16
+CATEGORIES = ["weapons", "armor", "spells"]
+
+
+def catalog(count, seed=0, start=0):
+    rng = np.random.default_rng(seed)
+    ids = [f"gamedata:item-{i}" for i in range(start, start + count)]
+    vectors = rng.standard_normal((count, DIMENSION)).astype(np.float32)
+    metadata = [{"name": f"Item {i}", "category": CATEGORIES[i % 3], "type": "Bow" if i % 4 else "blade",
+                 "content_hash": f"hash-{i}"} for i in range(start, start + count)]
+    return ids, vectors, metadata
+
+
+def results(store, queries):
+    """Everything a caller can observe: matches for several filters, IDs and hashes"""
+    observed = []
+    for metadata_filter in (None, {"category": ["weapons"]}, {"category": ["armor", "spells"], "type": ["bow"]}):
+        for matches in store.query_batch(queries, top_k=7, filter=metadata_filter):
+            observed.append([(match.id, round(match.score, 5), match.metadata) for match in matches])
+    ids = store.list_ids("gamedata:")
+    observed.append(sorted(ids))
+    observed.append(store.fetch_content_hashes(ids + ["gamedata:missing"]))
+    observed.append(store.count())
+    return observed
+
+
+@pytest.fixture(params=["float32", "int8", "binary"])
+def storage(request):
+    return request.param
+
+
+def test_attached_snapshot_matches_private_store(tmp_path, storage):
+    ids, vectors, metadata = catalog(120)
+    publisher = LocalVectorStore(dimension=DIMENSION, storage=storage, source_dir=str(tmp_path / "a"))
+    publisher.upsert(ids, vectors, metadata)
+    private = LocalVectorStore(dimension=DIMENSION, storage=storage, source_dir=str(tmp_path / "b"))
+    private.upsert(ids, vectors, metadata)
+    publisher.publish_snapshot(str(tmp_path / "snapshot"))
+
+    worker = LocalVectorStore(dimension=DIMENSION, storage=storage, source_dir=str(tmp_path / "c"))
+    assert worker.attach_snapshot(str(tmp_path / "snapshot"))
+    assert worker.stats()["snapshot"] is not None
+
+    queries = np.random.default_rng(9).standard_normal((3, DIMENSION)).astype(np.float32)
+    assert results(worker, queries) == results(private, queries)
+    assert results(publisher, queries) == results(private, queries)
+
+
+def test_writes_after_attaching_match_private_store(tmp_path, storage):
+    ids, vectors, metadata = catalog(120)
+    publisher = LocalVectorStore(dimension=DIMENSION, storage=storage, source_dir=str(tmp_path / "a"))
+    publisher.upsert(ids, vectors, metadata)
+    publisher.publish_snapshot(str(tmp_path / "snapshot"))
+    worker = LocalVectorStore(dimension=DIMENSION, storage=storage, source_dir=str(tmp_path / "b"))
+    assert worker.attach_snapshot(str(tmp_path / "snapshot"))
+    private = LocalVectorStore(dimension=DIMENSION, storage=storage, source_dir=str(tmp_path / "c"))
+    private.upsert(ids, vectors, metadata)
+
+    new_ids, new_vectors, new_metadata = catalog(10, seed=1, start=120)
+    changed_ids, changed_vectors, changed_metadata = catalog(5, seed=2, start=0)
+    changed_metadata = [dict(item, category="spells", content_hash="changed") for item in changed_metadata]
+    queries = np.random.default_rng(4).standard_normal((3, DIMENSION)).astype(np.float32)
+    version = worker.version
+
+    for store in (worker, private):
+        store.upsert(new_ids, new_vectors, new_metadata)
+        store.upsert(changed_ids, changed_vectors, changed_metadata)
+        store.delete(["gamedata:item-7", "gamedata:item-8", "gamedata:missing"])
+
+    assert worker.stats()["snapshot"] is None
+    assert worker.version > version
+    assert results(worker, queries) == results(private, queries)
+
+    # The snapshot on disk is untouched, so another worker still sees the published data
+    reader = LocalVectorStore(dimension=DIMENSION, storage=storage, source_dir=str(tmp_path / "d"))
+    assert reader.attach_snapshot(str(tmp_path / "snapshot"))
+    assert reader.count() == 120
+    assert reader.fetch_content_hashes(["gamedata:item-0"]) == {"gamedata:item-0": "hash-0"}
+
+
+def test_deleting_unknown_ids_keeps_snapshot_attached(tmp_path):
+    ids, vectors, metadata = catalog(20)
+    publisher = LocalVectorStore(dimension=DIMENSION)
+    publisher.upsert(ids, vectors, metadata)
+    publisher.publish_snapshot(str(tmp_path))
+
+    worker = LocalVectorStore(dimension=DIMENSION)
+    assert worker.attach_snapshot(str(tmp_path))
+    worker.delete(["gamedata:missing"])
+    assert worker.stats()["snapshot"] is not None
+
+
+def test_snapshot_for_other_storage_is_ignored(tmp_path):
+    ids, vectors, metadata = catalog(20)
+    publisher = LocalVectorStore(dimension=DIMENSION)
+    publisher.upsert(ids, vectors, metadata)
+    publisher.publish_snapshot(str(tmp_path))
+
+    assert not LocalVectorStore(dimension=DIMENSION, storage="int8", source_dir=str(tmp_path / "v")).attach_snapshot(
+        str(tmp_path))
+    assert not LocalVectorStore(dimension=DIMENSION * 2).attach_snapshot(str(tmp_path))
+    assert not LocalVectorStore(dimension=DIMENSION).attach_snapshot(str(tmp_path / "empty"))
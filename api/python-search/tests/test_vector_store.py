@@ -0,0 +1,139 @@
+"""Metadata filter semantics of the local and Pinecone vector stores"""
+
+import numpy as np
+import pytest
+
+from stand_ins import FakePineconeIndex
+from vector_store import LocalVectorStore, PineconeVectorStore
+
+DIMENSION = 16
+CATEGORIES = ["weapons", "armor", "spells", "skills"]
+TYPES = ["bow", "blade", "heavy", "light", ""]
+RARITIES = ["common", "rare", "legendary"]
+
+
+def catalog(count=200, seed=0, mixed_case=False):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, DIMENSION)).astype(np.float32)
+    metadata = []
+    for i in range(count):
+        item = {
+            "name": f"item {i}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "type": TYPES[i % len(TYPES)],
+            "rarity": RARITIES[i % len(RARITIES)],
+        }
+        if mixed_case and i % 2:
+            item = {field: value.title() for field, value in item.items()}
+        metadata.append(item)
+    return [f"id-{i}" for i in range(count)], vectors, metadata
+
+
+def expected_ids(ids, vectors, metadata, query, metadata_filter, top_k):
+    """Brute force: filter rows (any value within a field, every field), then rank by cosine"""
+    def matches(item):
+        return all(str(item.get(field, "")).lower() in [value.lower() for value in values]
+                   for field, values in metadata_filter.items())
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    rows = [row for row in np.argsort(-scores, kind="stable") if matches(metadata[row])]
+    return [ids[row] for row in rows[:top_k]]
+
+
+FILTERS = [
+    {"category": ["weapons"]},
+    {"category": ["Weapons"]},
+    {"category": ["weapons", "spells"]},
+    {"category": ["weapons"], "type": ["bow"]},
+    {"category": ["armor"], "type": ["heavy", "light"], "rarity": ["rare"]},
+    {"category": ["potions"]},
+    {"category": ["weapons"], "type": ["heavy"], "rarity": ["nope"]},
+]
+
+
+@pytest.mark.parametrize("metadata_filter", FILTERS)
+@pytest.mark.parametrize("mixed_case", [False, True])
+def test_local_filter_matches_brute_force(metadata_filter, mixed_case):
+    ids, vectors, metadata = catalog(mixed_case=mixed_case)
+    store = LocalVectorStore(dimension=DIMENSION)
+    store.upsert(ids, vectors, metadata)
+
+    query = np.random.default_rng(1).standard_normal(DIMENSION).astype(np.float32)
+    for top_k in (1, 5, 40):
+        matches = store.query(query, top_k=top_k, filter=metadata_filter)
+        assert [match.id for match in matches] == expected_ids(ids, vectors, metadata, query, metadata_filter, top_k)
+
+
+def test_local_filter_partitions_follow_writes():
+    ids, vectors, metadata = catalog()
+    store = LocalVectorStore(dimension=DIMENSION)
+    store.upsert(ids, vectors, metadata)
+    query = vectors[0]
+    assert store.query(query, top_k=1, filter={"category": ["weapons"]})[0].id == "id-0"
+
+    # Moving the item to another category updates the cached partitions
+    store.upsert(["id-0"], vectors[:1], [dict(metadata[0], category="spells")])
+    assert store.query(query, top_k=1, filter={"category": ["weapons"]})[0].id != "id-0"
+    assert store.query(query, top_k=1, filter={"category": ["spells"]})[0].id == "id-0"
+
+    store.delete(["id-0"])
+    assert "id-0" not in [match.id for match in store.query(query, top_k=200, filter={"category": ["spells"]})]
+
+
+@pytest.mark.parametrize("metadata_filter, expected", [
+    (None, None),
+    ({}, None),
+    ({"category": ["Weapons"]}, {"category": {"$in": ["weapons"]}}),
+    ({"category": ["weapons"], "type": ["bow", "Blade"]},
+     {"$and": [{"category": {"$in": ["weapons"]}}, {"type": {"$in": ["bow", "blade"]}}]}),
+])
+def test_pinecone_filter_translation(metadata_filter, expected):
+    assert PineconeVectorStore._pinecone_filter(metadata_filter) == expected
+
+
+@pytest.mark.parametrize("metadata_filter", FILTERS)
+def test_pinecone_and_local_agree(metadata_filter):
+    ids, vectors, metadata = catalog()
+    local = LocalVectorStore(dimension=DIMENSION)
+    local.upsert(ids, vectors, metadata)
+    pinecone = PineconeVectorStore(FakePineconeIndex(dimension=DIMENSION))
+    pinecone.upsert(ids, vectors, metadata)
+
+    query = np.random.default_rng(2).standard_normal(DIMENSION).astype(np.float32)
+    local_ids = [match.id for match in local.query(query, top_k=10, filter=metadata_filter)]
+    pinecone_ids = [match.id for match in pinecone.query(query, top_k=10, filter=metadata_filter)]
+    assert local_ids == pinecone_ids
+
+
+def test_pinecone_filter_is_case_sensitive_on_stored_values():
+    # Pinecone compares stored metadata exactly, which is why writers lowercase filterable fields
+    ids, vectors, metadata = catalog(count=8, mixed_case=True)
+    store = PineconeVectorStore(FakePineconeIndex(dimension=DIMENSION))
+    store.upsert(ids, vectors, metadata)
+    matches = store.query(vectors[0], top_k=8, filter={"category": ["Weapons"]})
+    assert {match.metadata["category"] for match in matches} == {"weapons"}
+    assert {match.id for match in matches} == {ids[row] for row in range(8) if metadata[row]["category"] == "weapons"}
+
+
+@pytest.mark.parametrize("storage", ["float32", "int8", "binary"])
+def test_batched_upserts_match_one_bulk_upsert(tmp_path, storage):
+    ids, vectors, metadata = catalog(count=2500)
+    bulk = LocalVectorStore(dimension=DIMENSION, storage=storage, source_dir=str(tmp_path / "bulk"))
+    bulk.upsert(ids, vectors, metadata)
+    batched = LocalVectorStore(dimension=DIMENSION, storage=storage, source_dir=str(tmp_path / "batched"))
+    for start in range(0, len(ids), 100):
+        batched.upsert(ids[start:start + 100], vectors[start:start + 100], metadata[start:start + 100])
+
+    # Replacing rows and deleting some after the buffers have grown keeps both stores in step
+    changed = np.random.default_rng(5).standard_normal((50, DIMENSION)).astype(np.float32)
+    for store in (bulk, batched):
+        store.upsert(ids[:50], changed, [dict(item, category="spells") for item in metadata[:50]])
+        store.delete(ids[100:200])
+        store.upsert(["extra"], changed[:1], [{"category": "armor"}])
+
+    assert batched.count() == bulk.count() == 2401
+    queries = np.random.default_rng(6).standard_normal((4, DIMENSION)).astype(np.float32)
+    for metadata_filter in (None, {"category": ["spells"]}, {"category": ["armor"], "rarity": ["rare"]}):
+        expected = bulk.query_batch(queries, top_k=10, filter=metadata_filter)
+        assert batched.query_batch(queries, top_k=10, filter=metadata_filter) == expected
@@ -0,0 +1,798 @@
+#!/usr/bin/env python3
+"""
+Vector Store Backends for BuildCraft AI
+Pluggable similarity search over item embeddings (in-process NumPy or Pinecone)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+from ann_index import IVFIndex, fingerprint
+
+
+@dataclass
+class VectorMatch:
+    """A single similarity search hit"""
+    id: str
+    score: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+# Metadata fields that can be pushed down into index queries as exact-match filters
+FILTER_FIELDS = ("category", "type", "rarity", "school")
+
+# A filter maps a field to the values it may take; fields are combined with AND
+MetadataFilter = Dict[str, List[str]]
+
+# How LocalVectorStore holds its scanned matrix in RAM
+STORAGE_MODES = ("float32", "float16", "int8", "binary")
+
+# Index types for LocalVectorStore: exhaustive scan or inverted-file ANN
+INDEX_TYPES = ("flat", "ivf")
+
+# Candidates rescored exactly per requested result; coarser codes need more
+DEFAULT_RESCORE_FACTORS = {"float32": 1, "float16": 2, "int8": 4, "binary": 10}
+
+# Bits set in each byte value, for Hamming distance on NumPy < 2.0 (no bitwise_count)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# Rows scored per block when codes must be widened to float32
+_SCORE_CHUNK_ROWS = 16384
+
+# Smallest row capacity allocated when LocalVectorStore storage grows
+_MIN_CAPACITY_ROWS = 1024
+
+
+class VectorStore:
+    """Interface shared by every vector store backend
+
+    version increases whenever this process writes to the store, so caches
+    keyed on it are invalidated by any re-population.
+    """
+
+    version = 0
+
+    # Most vectors index sync sends per upsert or delete call; None sends them all at once
+    write_batch_size: Optional[int] = None
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray, metadata: Sequence[Dict[str, Any]]) -> None:
+        """Insert or replace vectors by ID"""
+        raise NotImplementedError
+
+    def query(self, vector: np.ndarray, top_k: int = 5, filter: Optional[MetadataFilter] = None) -> List[VectorMatch]:
+        """Return the top_k most similar vectors matching the filter, best first"""
+        raise NotImplementedError
+
+    def query_batch(self, vectors: np.ndarray, top_k: int = 5,
+                    filter: Optional[MetadataFilter] = None) -> List[List[VectorMatch]]:
+        """Return the top_k matches for each row of a query matrix, in order"""
+        return [self.query(vector, top_k=top_k, filter=filter) for vector in vectors]
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Remove vectors by ID"""
+        raise NotImplementedError
+
+    def list_ids(self, prefix: str = "") -> List[str]:
+        """IDs of every stored vector starting with prefix"""
+        raise NotImplementedError
+
+    def fetch_content_hashes(self, ids: Sequence[str]) -> Dict[str, Optional[str]]:
+        """The content_hash metadata recorded for each stored ID"""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Number of vectors currently stored"""
+        raise NotImplementedError
+
+    def build_index(self) -> None:
+        """Build or load any search index ahead of the first query"""
+
+    def attach_snapshot(self, directory: str) -> bool:
+        """Serve from a shared read-only snapshot if one exists; True if attached"""
+        return False
+
+    def publish_snapshot(self, directory: str) -> None:
+        """Write the current contents as the shared snapshot other processes attach to"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend details for /stats"""
+        return {"version": self.version}
+
+
+class LocalVectorStore(VectorStore):
+    """In-process cosine similarity search over a contiguous embedding matrix
+
+    Filterable metadata fields are indexed into per-value row partitions, so a
+    filtered query only scores the rows in the matching partition.
+
+    storage selects how the scanned matrix is held in RAM:
+    float32 (exact, 4 bytes/dim), float16 (2), int8 with a per-vector scale
+    (~1) or binary sign bits compared by Hamming distance (1/8). The compact
+    modes score every candidate approximately, then rescore the best
+    top_k * rescore_factor rows exactly against the float32 vectors, which
+    are kept in a memory-mapped file under source_dir instead of RAM.
+
+    index="ivf" restricts each query to the nprobe nearest inverted lists once
+    the store holds at least ann_min_vectors rows (see ann_index.IVFIndex).
+    The index is rebuilt after writes and cached at index_path.
+
+    publish_snapshot writes vectors, codes, IDs and metadata to memory-mapped
+    files that other worker processes attach_snapshot to read-only, so they
+    share one copy through the page cache. A write after attaching first
+    copies the data back into private memory.
+    """
+
+    def __init__(self, dimension: int = 384, storage: str = "float32", rescore_factor: Optional[int] = None,
+                 source_dir: Optional[str] = None, index: str = "flat", nlist: int = 0, nprobe: int = 16,
+                 ann_min_vectors: int = 50000, index_path: Optional[str] = None):
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode '{storage}', expected one of {', '.join(STORAGE_MODES)}")
+        if index not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{index}', expected one of {', '.join(INDEX_TYPES)}")
+        self.dimension = dimension
+        self.storage = storage
+        self.rescore_factor = max(1, rescore_factor or DEFAULT_RESCORE_FACTORS[storage])
+        # Rows live in buffers with spare capacity; _vectors, _codes and _scales
+        # are views of the first count() rows
+        self._vector_buffer = np.empty((0, dimension), dtype=np.float32)
+        self._code_buffer, self._scale_buffer = _quantize(self._vector_buffer, storage)
+        self._set_row_count(0)
+        self._source_path = None
+        if storage != "float32":
+            if source_dir is None:
+                source_dir = tempfile.mkdtemp(prefix="buildcraft-vectors-")
+                weakref.finalize(self, shutil.rmtree, source_dir, True)
+            os.makedirs(source_dir, exist_ok=True)
+            self._source_path = os.path.join(source_dir, f"vectors-{os.getpid()}-{id(self)}.npy")
+        self._ids: Sequence[str] = []
+        self._metadata: Sequence[Dict[str, Any]] = []
+        self._id_to_row: Optional[Dict[str, int]] = {}  # None while attached to a snapshot
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._partitions: Optional[Dict[str, Dict[str, np.ndarray]]] = None
+        self._partition_vectors: Dict[tuple, tuple] = {}
+        self.index_type = index
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.ann_min_vectors = ann_min_vectors
+        self.index_path = index_path
+        self._ann: Optional[IVFIndex] = None
+        self._ann_lock = threading.Lock()
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray, metadata: Sequence[Dict[str, Any]]) -> None:
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dimension))
+        self._detach_snapshot()
+
+        # Existing IDs are replaced in place, new ones appended after the last row
+        rows = np.empty(len(ids), dtype=np.int64)
+        for i, vector_id in enumerate(ids):
+            row = self._id_to_row.get(vector_id)
+            if row is None:
+                row = self._id_to_row[vector_id] = len(self._ids)
+                self._ids.append(vector_id)
+                self._metadata.append(dict(metadata[i]))
+            else:
+                self._metadata[row] = dict(metadata[i])
+            rows[i] = row
+
+        self._write_rows(rows, vectors)
+
+        # Partitions and the ANN index are rebuilt lazily on the next query
+        self._partitions = None
+        self._partition_vectors = {}
+        self._ann = None
+        self.version += 1
+
+    def delete(self, ids: Sequence[str]) -> None:
+        rows = {row for row in map(self._row_of, ids) if row is not None}
+        if not rows:
+            return
+        self._detach_snapshot()
+
+        keep = [row for row in range(len(self._ids)) if row not in rows]
+        self._allocate(len(keep), self._vectors[keep], self._codes[keep],
+                       self._scales[keep] if self._scales is not None else None)
+        self._ids = [self._ids[row] for row in keep]
+        self._metadata = [self._metadata[row] for row in keep]
+        self._id_to_row = {vector_id: row for row, vector_id in enumerate(self._ids)}
+
+        self._partitions = None
+        self._partition_vectors = {}
+        self._ann = None
+        self.version += 1
+
+    def _write_rows(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Store normalized float32 vectors at rows, extending the store to count() rows
+
+        Storage grows geometrically, so filling the store batch by batch costs
+        amortized linear time, and only the written rows are quantized.
+        """
+        count = len(self._ids)
+        if count > len(self._vector_buffer):
+            self._allocate(max(count, len(self._vector_buffer) * 3 // 2, _MIN_CAPACITY_ROWS),
+                           self._vectors, self._codes, self._scales)
+        self._vector_buffer[rows] = vectors
+        if self._source_path is not None:
+            codes, scales = _quantize(vectors, self.storage)
+            self._code_buffer[rows] = codes
+            if scales is not None:
+                self._scale_buffer[rows] = scales
+        self._set_row_count(count)
+
+    def _allocate(self, capacity: int, vectors: np.ndarray, codes: np.ndarray, scales: Optional[np.ndarray]) -> None:
+        """Move the stored rows into new buffers with room for capacity rows
+
+        In compact storage modes the float32 rows go to a new memory-mapped
+        source file, which replaces the old one.
+        """
+        count = len(vectors)
+        if self._source_path is None:
+            self._vector_buffer = np.empty((capacity, self.dimension), dtype=np.float32)
+            self._vector_buffer[:count] = vectors
+            self._code_buffer, self._scale_buffer = self._vector_buffer, None
+        else:
+            tmp_path = self._source_path + ".tmp.npy"
+            buffer = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32,
+                                               shape=(max(capacity, 1), self.dimension))
+            buffer[:count] = vectors
+            os.replace(tmp_path, self._source_path)
+            self._vector_buffer = buffer[:capacity]
+            self._code_buffer = np.empty((capacity,) + codes.shape[1:], dtype=codes.dtype)
+            self._code_buffer[:count] = codes
+            if scales is not None:
+                self._scale_buffer = np.empty(capacity, dtype=scales.dtype)
+                self._scale_buffer[:count] = scales
+        self._set_row_count(count)
+
+    def _set_row_count(self, count: int) -> None:
+        self._vectors = self._vector_buffer[:count]
+        self._codes = self._code_buffer[:count]
+        self._scales = self._scale_buffer[:count] if self._scale_buffer is not None else None
+
+    def list_ids(self, prefix: str = "") -> List[str]:
+        return [vector_id for vector_id in self._ids if vector_id.startswith(prefix)]
+
+    def fetch_content_hashes(self, ids: Sequence[str]) -> Dict[str, Optional[str]]:
+        if self._snapshot is not None:
+            hashes = self._snapshot["content_hashes"]
+            return {vector_id: hashes[row] or None for vector_id, row in zip(ids, map(self._row_of, ids))
+                    if row is not None}
+        return {
+            vector_id: self._metadata[self._id_to_row[vector_id]].get("content_hash")
+            for vector_id in ids if vector_id in self._id_to_row
+        }
+
+    def _row_of(self, vector_id: str) -> Optional[int]:
+        if self._id_to_row is not None:
+            return self._id_to_row.get(vector_id)
+        # Attached snapshots look IDs up in a sorted, memory-mapped array instead of a dict
+        sorted_ids = self._snapshot["sorted_ids"]
+        key = vector_id.encode("utf-8")
+        position = int(np.searchsorted(sorted_ids, key))
+        if position < len(sorted_ids) and sorted_ids[position] == key:
+            return int(self._snapshot["sorted_rows"][position])
+        return None
+
+    def attach_snapshot(self, directory: str) -> bool:
+        path = _current_snapshot(directory)
+        if path is None:
+            return False
+        try:
+            with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest["dimension"] != self.dimension or manifest["storage"] != self.storage:
+                print(f"Warning: ignoring snapshot {path} built for {manifest['storage']} "
+                      f"{manifest['dimension']}-dim vectors")
+                return False
+
+            def load(name: str) -> np.ndarray:
+                return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+            vectors = load("vectors")
+            offsets = load("metadata_offsets")
+            blob_path = os.path.join(path, "metadata.jsonl")
+            blob = np.memmap(blob_path, dtype=np.uint8, mode="r") if offsets[-1] else np.empty(0, dtype=np.uint8)
+            snapshot = {
+                "path": path,
+                "fingerprint": manifest["fingerprint"],
+                "sorted_ids": load("sorted_ids"),
+                "sorted_rows": load("sorted_rows"),
+                "content_hashes": _SnapshotStrings(load("content_hashes")),
+                "fields": {field: load(f"field_{field}") for field in FILTER_FIELDS}
+            }
+            ids = _SnapshotStrings(load("ids"))
+            codes = vectors if self.storage == "float32" else load("codes")
+            scales = load("scales") if self.storage == "int8" else None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: ignoring unreadable snapshot {path}: {e}")
+            return False
+
+        self._vector_buffer, self._code_buffer, self._scale_buffer = vectors, codes, scales
+        self._set_row_count(len(vectors))
+        self._ids = ids
+        self._metadata = _SnapshotMetadata(blob, offsets)
+        self._id_to_row = None
+        self._snapshot = snapshot
+        self._partitions = None
+        self._partition_vectors = {}
+        self._ann = None
+        self.version += 1
+        return True
+
+    def publish_snapshot(self, directory: str) -> None:
+        """Write a new snapshot generation, point CURRENT at it and attach to it"""
+        count = len(self._ids)
+        path = os.path.join(directory, f"{int(time.time() * 1000)}-{os.getpid()}")
+        os.makedirs(path)
+
+        def save(name: str, array: np.ndarray) -> None:
+            np.save(os.path.join(path, f"{name}.npy"), array)
+
+        save("vectors", np.asarray(self._vectors, dtype=np.float32))
+        if self.storage != "float32":
+            save("codes", np.asarray(self._codes))
+        if self._scales is not None:
+            save("scales", np.asarray(self._scales))
+
+        ids = _encode_strings(list(self._ids))
+        order = np.argsort(ids, kind="stable")
+        save("ids", ids)
+        save("sorted_ids", ids[order])
+        save("sorted_rows", order.astype(np.int64))
+
+        metadata = [self._metadata[row] for row in range(count)]
+        encoded = [json.dumps(item, sort_keys=True, separators=(",", ":")).encode("utf-8") for item in metadata]
+        with open(os.path.join(path, "metadata.jsonl"), "wb") as f:
+            f.write(b"".join(encoded))
+        save("metadata_offsets", np.concatenate([[0], np.cumsum([len(item) for item in encoded])]).astype(np.int64))
+        save("content_hashes", _encode_strings([item.get("content_hash") or "" for item in metadata]))
+        for field in FILTER_FIELDS:
+            save(f"field_{field}", _encode_strings([str(item.get(field) or "").lower() for item in metadata]))
+
+        with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "dimension": self.dimension,
+                "storage": self.storage,
+                "count": count,
+                "fingerprint": self._rows_fingerprint()
+            }, f)
+
+        # Switch CURRENT atomically, then drop older generations
+        current_tmp = os.path.join(directory, "CURRENT.tmp")
+        with open(current_tmp, "w", encoding="utf-8") as f:
+            f.write(os.path.basename(path))
+        os.replace(current_tmp, os.path.join(directory, "CURRENT"))
+        for name in os.listdir(directory):
+            old = os.path.join(directory, name)
+            if old != path and os.path.isdir(old):
+                shutil.rmtree(old, ignore_errors=True)
+
+        self.attach_snapshot(directory)
+
+    def _detach_snapshot(self) -> None:
+        """Copy attached snapshot data into private memory before a write"""
+        if self._snapshot is None:
+            return
+        count = len(self._ids)
+        self._ids = list(self._ids)
+        self._metadata = [self._metadata[row] for row in range(count)]
+        self._id_to_row = {vector_id: row for row, vector_id in enumerate(self._ids)}
+        self._allocate(count, self._vectors, self._codes, self._scales)
+        self._snapshot = None
+
+    def _rows_fingerprint(self) -> str:
+        if self._snapshot is not None:
+            return self._snapshot["fingerprint"]
+        return fingerprint(self._ids, [metadata.get("content_hash") for metadata in self._metadata])
+
+    def query(self, vector: np.ndarray, top_k: int = 5, filter: Optional[MetadataFilter] = None) -> List[VectorMatch]:
+        return self.query_batch(np.asarray(vector).reshape(1, self.dimension), top_k=top_k, filter=filter)[0]
+
+    def query_batch(self, vectors: np.ndarray, top_k: int = 5,
+                    filter: Optional[MetadataFilter] = None) -> List[List[VectorMatch]]:
+        query_matrix = _normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension))
+        if len(self._ids) == 0 or top_k <= 0:
+            return [[] for _ in range(len(query_matrix))]
+
+        rows, codes, scales = self._filtered_vectors(filter)
+        if len(rows) == 0:
+            return [[] for _ in range(len(query_matrix))]
+
+        ann = self._ann_index()
+        if ann is not None:
+            return [self._ann_query(ann, query, rows if filter else None, top_k) for query in query_matrix]
+
+        # One pass scores every query against every candidate vector
+        if codes is None:
+            # Attached snapshot: score the shared mapping rather than copying the partition
+            scores = _approximate_scores(query_matrix, self._codes, self._scales, self.storage)[:, rows]
+        else:
+            scores = _approximate_scores(query_matrix, codes, scales, self.storage)
+        if self.storage == "float32":
+            return [self._top_matches(row_scores, rows, top_k) for row_scores in scores]
+        return [
+            self._rescore(query, row_scores, rows, top_k)
+            for query, row_scores in zip(query_matrix, scores)
+        ]
+
+    def _ann_query(self, ann: IVFIndex, query: np.ndarray, filter_rows: Optional[np.ndarray],
+                   top_k: int) -> List[VectorMatch]:
+        """Score only the rows in the probed inverted lists"""
+        rows = ann.candidates(query)
+        if filter_rows is not None:
+            if len(filter_rows) <= len(rows):
+                # A small partition is cheaper to scan exhaustively
+                rows = filter_rows
+            else:
+                rows = np.intersect1d(rows, filter_rows, assume_unique=True)
+        if len(rows) == 0:
+            return []
+
+        scales = self._scales[rows] if self._scales is not None else None
+        scores = _approximate_scores(query.reshape(1, -1), self._codes[rows], scales, self.storage)[0]
+        if self.storage == "float32":
+            return self._top_matches(scores, rows, top_k)
+        return self._rescore(query, scores, rows, top_k)
+
+    def _ann_index(self) -> Optional[IVFIndex]:
+        if self.index_type != "ivf" or len(self._ids) < self.ann_min_vectors:
+            return None
+        if self._ann is None:
+            self.build_index()
+        return self._ann
+
+    def build_index(self) -> None:
+        """Load the IVF index from index_path if it matches the rows, else build and save it"""
+        if self.index_type != "ivf" or len(self._ids) < self.ann_min_vectors:
+            return
+        with self._ann_lock:
+            if self._ann is not None:
+                return
+            rows_fingerprint = self._rows_fingerprint()
+            ann = IVFIndex.load(self.index_path, nprobe=self.nprobe) if self.index_path else None
+            if ann is None or ann.fingerprint != rows_fingerprint or len(ann.order) != len(self._ids):
+                ann = IVFIndex.build(self._vectors, nlist=self.nlist, nprobe=self.nprobe,
+                                     fingerprint=rows_fingerprint)
+                print(f"✅ Built IVF index over {len(self._ids)} vectors ({ann.nlist} lists) "
+                      f"in {ann.build_seconds:.2f}s")
+                if self.index_path:
+                    ann.save(self.index_path)
+            self._ann = ann
+
+    def _rescore(self, query: np.ndarray, scores: np.ndarray, rows: np.ndarray, top_k: int) -> List[VectorMatch]:
+        """Exact float32 scores for the best approximate candidates"""
+        n = min(len(scores), top_k * self.rescore_factor)
+        if n < len(scores):
+            candidates = np.sort(np.argpartition(-scores, n - 1)[:n])
+        else:
+            candidates = np.arange(len(scores))
+        candidate_rows = rows[candidates]  # ascending, so ties keep row order
+        exact = self._vectors[candidate_rows] @ query
+        return self._top_matches(exact, candidate_rows, top_k)
+
+    def _top_matches(self, scores: np.ndarray, rows: np.ndarray, top_k: int) -> List[VectorMatch]:
+        """Partial selection of the best rows, then order just those"""
+        k = min(top_k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [
+            VectorMatch(id=self._ids[rows[i]], score=float(scores[i]), metadata=self._metadata[rows[i]])
+            for i in top
+        ]
+
+    def _filtered_vectors(self, filter: Optional[MetadataFilter]):
+        """Return the row numbers matching the filter and their contiguous codes and scales
+
+        Codes and scales are None for an attached snapshot.
+        """
+        if not filter:
+            return np.arange(len(self._ids)), self._codes, self._scales
+
+        key = tuple(sorted((field, tuple(sorted(str(value).lower() for value in values)))
+                           for field, values in filter.items()))
+        cached = self._partition_vectors.get(key)
+        if cached is not None:
+            return cached
+
+        partitions = self._build_partitions()
+        rows = None
+        for field, values in key:
+            field_partitions = partitions.get(field, {})
+            field_rows = [field_partitions[value] for value in values if value in field_partitions]
+            field_rows = np.unique(np.concatenate(field_rows)) if field_rows else np.empty(0, dtype=np.int64)
+            rows = field_rows if rows is None else np.intersect1d(rows, field_rows, assume_unique=True)
+
+        # Gather the partition once so repeated filtered queries scan a contiguous block;
+        # attached snapshots keep only the row numbers so workers don't copy shared data
+        if self._snapshot is not None:
+            result = (rows, None, None)
+        else:
+            result = (
+                rows,
+                np.ascontiguousarray(self._codes[rows]),
+                self._scales[rows] if self._scales is not None else None
+            )
+        if len(self._partition_vectors) >= 64:
+            self._partition_vectors.clear()
+        self._partition_vectors[key] = result
+        return result
+
+    def _build_partitions(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Index filterable fields into value -> row number partitions"""
+        if self._partitions is None and self._snapshot is not None:
+            # Group the memory-mapped filter columns without decoding any metadata
+            self._partitions = {}
+            for field, column in self._snapshot["fields"].items():
+                values, inverse = np.unique(np.asarray(column), return_inverse=True)
+                order = np.argsort(inverse, kind="stable")
+                bounds = np.searchsorted(inverse[order], np.arange(len(values) + 1))
+                self._partitions[field] = {
+                    value.decode("utf-8"): order[bounds[i]:bounds[i + 1]].astype(np.int64)
+                    for i, value in enumerate(values) if value
+                }
+        if self._partitions is None:
+            partitions: Dict[str, Dict[str, List[int]]] = {field: {} for field in FILTER_FIELDS}
+            for row, metadata in enumerate(self._metadata):
+                for field in FILTER_FIELDS:
+                    value = metadata.get(field)
+                    if value:
+                        partitions[field].setdefault(str(value).lower(), []).append(row)
+            self._partitions = {
+                field: {value: np.array(rows, dtype=np.int64) for value, rows in values.items()}
+                for field, values in partitions.items()
+            }
+        return self._partitions
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def stats(self) -> Dict[str, Any]:
+        resident = self._codes.nbytes + (self._scales.nbytes if self._scales is not None else 0)
+        count = len(self._ids)
+        return {
+            "version": self.version,
+            "storage": self.storage,
+            "snapshot": self._snapshot["path"] if self._snapshot is not None else None,
+            "vectors": count,
+            "resident_bytes": int(resident),
+            "bytes_per_vector": round(resident / count, 2) if count else 0.0,
+            "float32_bytes_per_vector": self.dimension * 4,
+            "rescore_factor": self.rescore_factor if self.storage != "float32" else None,
+            "index": self._ann.stats() if self._ann is not None else {"type": "flat"}
+        }
+
+
+class PineconeVectorStore(VectorStore):
+    """Vector store backed by a hosted Pinecone index"""
+
+    # Keeps each upsert request well under Pinecone's request size limit
+    write_batch_size = 100
+
+    def __init__(self, index):
+        self.index = index
+
+    @classmethod
+    def connect(cls, api_key: str, index_name: str, dimension: int = 384, region: str = "us-east-1") -> "PineconeVectorStore":
+        """Connect to a Pinecone index, creating it if it doesn't exist"""
+        from pinecone import Pinecone, ServerlessSpec
+
+        pc = Pinecone(api_key=api_key)
+
+        # Check if index exists
+        if index_name not in pc.list_indexes().names():
+            print(f"Creating Pinecone index: {index_name}")
+            pc.create_index(
+                name=index_name,
+                dimension=dimension,
+                metric="cosine",
+                spec=ServerlessSpec(cloud="aws", region=region)
+            )
+
+        return cls(pc.Index(index_name))
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray, metadata: Sequence[Dict[str, Any]]) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.index.upsert(vectors=[
+            {"id": vector_id, "values": vectors[i].tolist(), "metadata": metadata[i]}
+            for i, vector_id in enumerate(ids)
+        ])
+        self.version += 1
+
+    def query(self, vector: np.ndarray, top_k: int = 5, filter: Optional[MetadataFilter] = None) -> List[VectorMatch]:
+        search_results = self.index.query(
+            vector=np.asarray(vector, dtype=np.float32).tolist(),
+            top_k=top_k,
+            include_metadata=True,
+            filter=self._pinecone_filter(filter)
+        )
+        return [
+            VectorMatch(id=match.id, score=match.score, metadata=match.metadata or {})
+            for match in search_results.matches
+        ]
+
+    def delete(self, ids: Sequence[str]) -> None:
+        if ids:
+            self.index.delete(ids=list(ids))
+            self.version += 1
+
+    def list_ids(self, prefix: str = "") -> List[str]:
+        # Paginated ID listing (serverless indexes)
+        ids = []
+        for page in self.index.list(prefix=prefix):
+            ids.extend(page)
+        return ids
+
+    def fetch_content_hashes(self, ids: Sequence[str], batch_size: int = 100) -> Dict[str, Optional[str]]:
+        hashes = {}
+        ids = list(ids)
+        for i in range(0, len(ids), batch_size):
+            response = self.index.fetch(ids=ids[i:i + batch_size])
+            for vector_id, vector in response.vectors.items():
+                hashes[vector_id] = (vector.metadata or {}).get("content_hash")
+        return hashes
+
+    @staticmethod
+    def _pinecone_filter(filter: Optional[MetadataFilter]) -> Optional[Dict[str, Any]]:
+        """Translate a metadata filter into Pinecone's filter syntax"""
+        if not filter:
+            return None
+        clauses = [
+            {field: {"$in": [str(value).lower() for value in values]}}
+            for field, values in filter.items()
+        ]
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def count(self) -> int:
+        return self.index.describe_index_stats().total_vector_count
+
+
+def create_vector_store(backend: str, dimension: int = 384, api_key: Optional[str] = None,
+                        index_name: Optional[str] = None, region: str = "us-east-1",
+                        storage: str = "float32", rescore_factor: Optional[int] = None,
+                        source_dir: Optional[str] = None, index: str = "flat", nlist: int = 0,
+                        nprobe: int = 16, ann_min_vectors: int = 50000,
+                        index_path: Optional[str] = None) -> VectorStore:
+    """Create a vector store for the configured backend ("local" or "pinecone")"""
+    if backend == "local":
+        return LocalVectorStore(dimension=dimension, storage=storage, rescore_factor=rescore_factor,
+                                source_dir=source_dir, index=index, nlist=nlist, nprobe=nprobe,
+                                ann_min_vectors=ann_min_vectors, index_path=index_path)
+    if backend == "pinecone":
+        if not api_key:
+            raise ValueError("PINECONE_API_KEY environment variable is required for the pinecone backend")
+        return PineconeVectorStore.connect(api_key, index_name, dimension=dimension, region=region)
+    raise ValueError(f"Unknown vector backend: {backend}")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so a dot product is cosine similarity"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _quantize(vectors: np.ndarray, storage: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Compact codes (and per-row scales for int8) for normalized float32 rows"""
+    if storage == "float32":
+        return vectors, None
+    if storage == "float16":
+        return vectors.astype(np.float16), None
+    if storage == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.empty(0, dtype=np.float32)
+        scales = np.where(scales == 0, 1.0, scales).astype(np.float32)
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales
+    return _sign_bits(vectors), None
+
+
+def _sign_bits(vectors: np.ndarray) -> np.ndarray:
+    """Pack sign bits into uint64 words (zero padded) for fast XOR and popcount"""
+    bits = np.packbits(vectors > 0, axis=1)
+    padding = -bits.shape[1] % 8
+    if padding:
+        bits = np.pad(bits, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(bits).view(np.uint64)
+
+
+def _hamming(codes: np.ndarray, bits: np.ndarray) -> np.ndarray:
+    """Hamming distance from one packed query to every packed row"""
+    diff = np.bitwise_xor(codes, bits)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(diff).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[diff.view(np.uint8)].sum(axis=1, dtype=np.int32)
+
+
+def _approximate_scores(queries: np.ndarray, codes: np.ndarray, scales: Optional[np.ndarray],
+                        storage: str) -> np.ndarray:
+    """Similarity of each query to each coded row; higher is better"""
+    if storage == "float32":
+        return queries @ codes.T
+    scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+    query_bits = _sign_bits(queries) if storage == "binary" else None
+    for start in range(0, len(codes), _SCORE_CHUNK_ROWS):
+        block = codes[start:start + _SCORE_CHUNK_ROWS]
+        end = start + len(block)
+        if storage == "binary":
+            # Negated Hamming distance between sign-bit codes
+            for i, bits in enumerate(query_bits):
+                scores[i, start:end] = -_hamming(block, bits)
+        else:
+            scores[:, start:end] = queries @ block.astype(np.float32).T
+            if scales is not None:
+                scores[:, start:end] *= scales[start:end]
+    return scores
+
+
+class _SnapshotStrings:
+    """Read-only sequence of strings decoded on access from a memory-mapped bytes array"""
+
+    def __init__(self, array: np.ndarray):
+        self._array = array
+
+    def __len__(self) -> int:
+        return len(self._array)
+
+    def __getitem__(self, row) -> str:
+        return self._array[row].decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return (value.decode("utf-8") for value in self._array)
+
+
+class _SnapshotMetadata:
+    """Read-only sequence of metadata dicts decoded on access from a memory-mapped JSON blob"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row) -> Dict[str, Any]:
+        return json.loads(self._blob[self._offsets[row]:self._offsets[row + 1]].tobytes())
+
+
+def _encode_strings(values: Sequence[str]) -> np.ndarray:
+    """UTF-8 bytes array (NumPy "S" dtype) for memory-mapped string columns"""
+    encoded = [value.encode("utf-8") for value in values]
+    width = max((len(value) for value in encoded), default=0)
+    return np.array(encoded, dtype=f"S{max(width, 1)}")
+
+
+def _current_snapshot(directory: str) -> Optional[str]:
+    """Directory of the snapshot generation CURRENT points at, if any"""
+    try:
+        with open(os.path.join(directory, "CURRENT"), "r", encoding="utf-8") as f:
+            path = os.path.join(directory, f.read().strip())
+    except OSError:
+        return None
+    return path if os.path.isdir(path) else None
+
+
+@contextmanager
+def snapshot_lock(directory: str):
+    """Serialize snapshot sync/publish across worker processes"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
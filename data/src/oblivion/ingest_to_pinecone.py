@@ -4,45 +4,69 @@ Ingest Oblivion Processed Data into Pinecone using HuggingFace Embeddings
 """
 
 import os
+import sys
 import json
-from tqdm import tqdm
+import argparse
 from sentence_transformers import SentenceTransformer
 from pinecone import Pinecone, ServerlessSpec
 
+# Share the search service's persistent embedding cache and index sync
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "api", "python-search"))
+from disk_embedding_cache import DiskEmbeddingCache
+from index_sync import assign_stable_ids, legacy_ids, sync_documents
+from vector_store import PineconeVectorStore
+
 # Configuration
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY")
 INDEX_NAME = "oblivion-buildcraft"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 DATA_PATH = "data/oblivion/oblivion_processed.json"
+ID_PREFIX = "processed"  # vector IDs owned by this script; the search service uses "gamedata"
 
 if not PINECONE_API_KEY:
     print("❌ Please set your Pinecone API key as the PINECONE_API_KEY environment variable.")
     exit(1)
 
 def main():
+    parser = argparse.ArgumentParser(description="Sync processed Oblivion data into Pinecone")
+    parser.add_argument("--purge-legacy", action="store_true",
+                        help="Delete vectors written before stable IDs (outside the processed/gamedata prefixes)")
+    args = parser.parse_args()
+
     # Load data
     print(f"Loading data from {DATA_PATH}...")
     with open(DATA_PATH, 'r', encoding='utf-8') as f:
         data = json.load(f)
 
     # Prepare documents for embedding
+    catalog_items = [
+        (category, item)
+        for category in ["skills", "weapons", "armor", "potions", "spells"]
+        for item in data.get(category, [])
+    ]
+    # IDs derive from category and item name, so reordering the data never shifts them
+    ids = assign_stable_ids(ID_PREFIX, catalog_items)
+
     all_docs = []
-    for category in ["skills", "weapons", "armor", "potions", "spells"]:
-        for item in data.get(category, []):
-            # Create a text chunk for each item
-            doc_text = f"Category: {category}\n"
-            for k, v in item.items():
-                doc_text += f"{k.capitalize()}: {v}\n"
-            
-            all_docs.append({
-                "text": doc_text,
-                "metadata": {
-                    "category": category, 
-                    "name": item.get("name", ""),
-                    "type": item.get("type", "unknown"),
-                    "properties": {k: v for k, v in item.items() if k not in ["name", "type", "category"]}
-                }
-            })
+    for vector_id, (category, item) in zip(ids, catalog_items):
+        # Create a text chunk for each item
+        doc_text = f"Category: {category}\n"
+        for k, v in item.items():
+            doc_text += f"{k.capitalize()}: {v}\n"
+        
+        all_docs.append({
+            "id": vector_id,
+            "text": doc_text,
+            "metadata": {
+                # Filterable fields are lowercased, as search filters match them case-insensitively
+                "category": category.lower(),
+                "name": item.get("name", ""),
+                "type": item.get("type", "unknown").lower(),
+                "rarity": item.get("rarity", "").lower(),
+                "school": item.get("school", "").lower(),
+                "properties": {k: v for k, v in item.items() if k not in ["name", "type", "category"]}
+            }
+        })
 
     print(f"Loaded {len(all_docs)} documents for embedding and ingestion.")
 
@@ -64,29 +88,28 @@ def main():
         )
 
     # Connect to the index
-    pc_index = pc.Index(INDEX_NAME)
-
-    # Embed and ingest data
-    print("Embedding and uploading documents to Pinecone...")
-    
-    batch_size = 64
-    for i in tqdm(range(0, len(all_docs), batch_size)):
-        batch = all_docs[i:i+batch_size]
-        texts = [doc["text"] for doc in batch]
-        embeddings = embedder.encode(texts, show_progress_bar=False)
-        
-        # Prepare Pinecone upsert format
-        vectors = []
-        for doc, emb in zip(batch, embeddings):
-            vectors.append({
-                "id": f"{doc['metadata']['category']}-{doc['metadata']['name'].replace(' ', '_')}-{i}",
-                "values": emb.tolist(),
-                "metadata": doc["metadata"]
-            })
-        
-        pc_index.upsert(vectors)
+    store = PineconeVectorStore(pc.Index(INDEX_NAME))
+
+    if args.purge_legacy:
+        stale = legacy_ids(store, [ID_PREFIX, "gamedata"])
+        print(f"Deleting {len(stale)} legacy vectors...")
+        for i in range(0, len(stale), 100):
+            store.delete(stale[i:i + 100])
+
+    # Embed and upsert only added or changed documents, delete removed ones.
+    # Embeddings come from the disk cache when the document text is unchanged.
+    print("Syncing documents with Pinecone...")
+    disk_cache = DiskEmbeddingCache(EMBEDDING_MODEL)
+    sync_stats = sync_documents(
+        store, all_docs, ID_PREFIX,
+        embed=lambda texts: disk_cache.encode(texts, lambda batch: embedder.encode(batch, show_progress_bar=False)),
+        batch_size=64
+    )
+    print(f"Embedding cache: {disk_cache.hits} reused, {disk_cache.misses} encoded")
 
-    print(f"✅ Ingestion complete! {len(all_docs)} documents embedded and uploaded to Pinecone index '{INDEX_NAME}'.")
+    print(f"✅ Sync complete! {len(all_docs)} documents in Pinecone index '{INDEX_NAME}': "
+          f"{sync_stats['added']} added, {sync_stats['updated']} updated, "
+          f"{sync_stats['deleted']} deleted, {sync_stats['unchanged']} unchanged.")
     print("You can now use semantic search with this data in BuildCraft AI.")
 
 if __name__ == "__main__":